@@ -19,7 +19,8 @@ from terraprint3d.preview import PreviewGenerator
 @click.option('--cache-info', is_flag=True, help='Show cache information and exit')
 @click.option('--preview', is_flag=True, help='Generate PNG preview of the terrain model')
 @click.option('--preview-type', type=click.Choice(['3d', 'heatmap', 'combined']), default='3d', help='Type of preview to generate')
-def main(config_file, google_api_key, verbose, no_cache, clear_cache, cache_info, preview, preview_type):
+@click.option('--validate-mesh', is_flag=True, help='Run the full mesh validation/repair pass (slower; the generator output is already watertight)')
+def main(config_file, google_api_key, verbose, no_cache, clear_cache, cache_info, preview, preview_type, validate_mesh):
     """Generate 3D printable terrain from YAML configuration."""
     
     try:
@@ -56,15 +57,15 @@ def main(config_file, google_api_key, verbose, no_cache, clear_cache, cache_info
         if config.output.format.lower() in ['3mf', 'amf', 'obj'] and config.terrain.colors.enabled:
             # Use colored export for formats that support embedded colors
             colored_exporter = ColoredMeshExporter(config)
-            mesh_generator = MeshGenerator(config)
+            mesh_generator = MeshGenerator(config, validate_mesh=validate_mesh)
             use_colored_export = True
         elif config.terrain.colors.enabled or config.terrain.height_stepping.enabled:
             # Use simple multi-color generator for separate STL files
-            mesh_generator = SimpleMultiColorMeshGenerator(config)
+            mesh_generator = SimpleMultiColorMeshGenerator(config, validate_mesh=validate_mesh)
             use_colored_export = False
         else:
             # Standard single mesh
-            mesh_generator = MeshGenerator(config)
+            mesh_generator = MeshGenerator(config, validate_mesh=validate_mesh)
             use_colored_export = False
         
         # Determine bounds
@@ -90,8 +91,9 @@ def main(config_file, google_api_key, verbose, no_cache, clear_cache, cache_info
             click.echo("Fetching elevation data...")
         
         lat_grid, lon_grid, elevation_grid = elevation_fetcher.fetch_elevation_grid(
-            bounds, 
-            config.terrain.resolution_meters
+            bounds,
+            config.terrain.resolution_meters,
+            fetch_decimation=config.terrain.fetch_decimation
         )
         
         if verbose:
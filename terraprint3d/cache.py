@@ -1,5 +1,5 @@
-import os
-import pickle
+import json
+import struct
 import hashlib
 import numpy as np
 from pathlib import Path
@@ -8,66 +8,135 @@ from terraprint3d.config.parser import BoundsConfig
 
 
 class ElevationCache:
+    # Fixed tile size for partial cache reuse across overlapping bounds
+    TILE_SIZE_DEGREES = 0.1
+
+    # Large write buffer so NPZ output coalesces into few big syscalls
+    WRITE_BUFFER_BYTES = 4 * 1024 * 1024
+
     def __init__(self, cache_dir: str = "data/elevation_cache"):
         self.cache_dir = Path(cache_dir)
         self.cache_dir.mkdir(parents=True, exist_ok=True)
-    
+
     def _generate_cache_key(self, bounds: BoundsConfig, resolution_meters: int, api_source: str) -> str:
-        """Generate a unique cache key for the given parameters."""
-        key_data = f"{bounds.north}_{bounds.south}_{bounds.east}_{bounds.west}_{resolution_meters}_{api_source}"
-        return hashlib.md5(key_data.encode()).hexdigest()
-    
+        """Generate a unique cache key for the given parameters.
+
+        Bounds are packed as raw doubles rather than formatted strings so
+        near-identical bounds can't miss the cache through float-to-string
+        rounding artifacts.
+        """
+        key_data = bounds.as_array().tobytes() + struct.pack(
+            '<i16s', resolution_meters, api_source.encode()[:16].ljust(16, b'\0'))
+        return hashlib.blake2b(key_data, digest_size=16).hexdigest()
+
+    def _grid_files(self, cache_key: str) -> Tuple[Path, Path, Path]:
+        return (self.cache_dir / f"{cache_key}.lat.npy",
+                self.cache_dir / f"{cache_key}.lon.npy",
+                self.cache_dir / f"{cache_key}.elev.npy")
+
     def get_cached_elevation(self, bounds: BoundsConfig, resolution_meters: int, api_source: str) -> Optional[Tuple[np.ndarray, np.ndarray, np.ndarray]]:
-        """Retrieve cached elevation data if it exists."""
+        """Retrieve cached elevation data if it exists.
+
+        Arrays are returned memory-mapped read-only, so pages are loaded
+        on demand and shared across processes. Callers that need to mutate
+        a grid must take a ``.copy()`` first.
+        """
         cache_key = self._generate_cache_key(bounds, resolution_meters, api_source)
-        cache_file = self.cache_dir / f"{cache_key}.pkl"
-        
-        if cache_file.exists():
+        lat_file, lon_file, elev_file = self._grid_files(cache_key)
+
+        if lat_file.exists() and lon_file.exists() and elev_file.exists():
             try:
-                with open(cache_file, 'rb') as f:
-                    cached_data = pickle.load(f)
-                    return cached_data['lat_grid'], cached_data['lon_grid'], cached_data['elevation_grid']
+                return (np.load(lat_file, mmap_mode='r'),
+                        np.load(lon_file, mmap_mode='r'),
+                        np.load(elev_file, mmap_mode='r'))
             except Exception as e:
                 print(f"Warning: Failed to load cached data: {e}")
-                # Remove corrupted cache file
-                cache_file.unlink(missing_ok=True)
-        
+                # Remove corrupted cache files
+                for stale in (lat_file, lon_file, elev_file):
+                    stale.unlink(missing_ok=True)
+                (self.cache_dir / f"{cache_key}.json").unlink(missing_ok=True)
+
         return None
-    
-    def cache_elevation_data(self, bounds: BoundsConfig, resolution_meters: int, api_source: str, 
+
+    def cache_elevation_data(self, bounds: BoundsConfig, resolution_meters: int, api_source: str,
                            lat_grid: np.ndarray, lon_grid: np.ndarray, elevation_grid: np.ndarray) -> None:
-        """Cache elevation data for future use."""
+        """Cache elevation data for future use.
+
+        Grids are stored as separate uncompressed float32 ``.npy`` files so
+        the reader can memory-map them - terrain data has far less than
+        float32 precision, so the downcast is lossless in practice.
+        """
         cache_key = self._generate_cache_key(bounds, resolution_meters, api_source)
-        cache_file = self.cache_dir / f"{cache_key}.pkl"
-        
-        cache_data = {
-            'bounds': bounds,
+        lat_file, lon_file, elev_file = self._grid_files(cache_key)
+        meta_file = self.cache_dir / f"{cache_key}.json"
+
+        metadata = {
+            'bounds': {'north': bounds.north, 'south': bounds.south,
+                      'east': bounds.east, 'west': bounds.west},
             'resolution_meters': resolution_meters,
             'api_source': api_source,
-            'lat_grid': lat_grid,
-            'lon_grid': lon_grid,
-            'elevation_grid': elevation_grid,
-            'cache_version': '1.0'
+            'cache_version': '3.0'
         }
-        
+
         try:
-            with open(cache_file, 'wb') as f:
-                pickle.dump(cache_data, f)
+            for path, grid in ((lat_file, lat_grid), (lon_file, lon_grid), (elev_file, elevation_grid)):
+                with open(path, 'wb', buffering=self.WRITE_BUFFER_BYTES) as f:
+                    np.save(f, grid.astype(np.float32))
+            with open(meta_file, 'w') as f:
+                json.dump(metadata, f)
         except Exception as e:
             print(f"Warning: Failed to cache elevation data: {e}")
-    
+
+    def _tile_file(self, tile_i: int, tile_j: int, resolution_meters: int, api_source: str) -> Path:
+        return self.cache_dir / f"tile_{tile_i}_{tile_j}_{resolution_meters}_{api_source}.npz"
+
+    def get_tile(self, tile_i: int, tile_j: int, resolution_meters: int, api_source: str) -> Optional[Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+        """Load one cached tile, returning (lat_points, lon_points, elevation) or None.
+
+        Tiles carry their own 1-D sample axes so callers can resample them
+        onto a differently-aligned request grid.
+        """
+        tile_file = self._tile_file(tile_i, tile_j, resolution_meters, api_source)
+
+        if tile_file.exists():
+            try:
+                with np.load(tile_file) as data:
+                    return data['lat_points'], data['lon_points'], data['elevation']
+            except Exception as e:
+                print(f"Warning: Failed to load cached tile: {e}")
+                tile_file.unlink(missing_ok=True)
+
+        return None
+
+    def put_tile(self, tile_i: int, tile_j: int, resolution_meters: int, api_source: str,
+                 lat_points: np.ndarray, lon_points: np.ndarray, elevation: np.ndarray) -> None:
+        """Store the samples falling inside one tile."""
+        tile_file = self._tile_file(tile_i, tile_j, resolution_meters, api_source)
+
+        try:
+            with open(tile_file, 'wb', buffering=self.WRITE_BUFFER_BYTES) as f:
+                np.savez_compressed(
+                    f,
+                    lat_points=lat_points.astype(np.float32),
+                    lon_points=lon_points.astype(np.float32),
+                    elevation=elevation.astype(np.float32)
+                )
+        except Exception as e:
+            print(f"Warning: Failed to cache elevation tile: {e}")
+
     def clear_cache(self) -> None:
         """Clear all cached elevation data."""
-        for cache_file in self.cache_dir.glob("*.pkl"):
-            cache_file.unlink()
-    
+        for pattern in ("*.npy", "*.npz", "*.json"):
+            for cache_file in self.cache_dir.glob(pattern):
+                cache_file.unlink()
+
     def get_cache_info(self) -> dict:
         """Get information about cached data."""
-        cache_files = list(self.cache_dir.glob("*.pkl"))
+        cache_files = list(self.cache_dir.glob("*.elev.npy")) + list(self.cache_dir.glob("tile_*.npz"))
         total_size = sum(f.stat().st_size for f in cache_files)
-        
+
         return {
             'cache_files': len(cache_files),
             'total_size_mb': total_size / (1024 * 1024),
             'cache_dir': str(self.cache_dir)
-        }
\ No newline at end of file
+        }
@@ -1,39 +1,59 @@
 import yaml
+
+# Prefer the libyaml C loader when PyYAML was built with it; the pure
+# Python loader parses the same documents several times slower
+try:
+    from yaml import CSafeLoader as _YamlLoader
+except ImportError:
+    from yaml import SafeLoader as _YamlLoader
+
+import numpy as np
 from dataclasses import dataclass
 from typing import Optional, Dict, Any
 from pathlib import Path
 
+# Supported export formats, hashed for O(1) validation lookups
+_VALID_FORMATS = frozenset({"stl", "3mf", "amf", "obj"})
 
-@dataclass
+
+@dataclass(slots=True)
 class BoundsConfig:
     north: float
     south: float
     east: float
     west: float
 
+    def as_array(self) -> 'np.ndarray':
+        """Bounds as a [north, south, east, west] float64 array.
+
+        Lets vectorized consumers (cache keys, tile math) work on raw
+        doubles instead of repeated Python attribute lookups.
+        """
+        return np.array([self.north, self.south, self.east, self.west], dtype=np.float64)
 
-@dataclass
+
+@dataclass(slots=True)
 class LocationConfig:
     address: Optional[str] = None
     radius_km: Optional[float] = None
     bounds: Optional[BoundsConfig] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class OutputConfig:
     filename: str
     printer_bed_mm: int = 220
     format: str = "stl"  # "stl", "3mf", "amf", "obj"
 
 
-@dataclass
+@dataclass(slots=True)
 class HeightSteppingConfig:
     enabled: bool = False
     step_height_mm: float = 2.0  # Height of each step
     smooth_transitions: bool = True  # Smooth step edges vs sharp
 
 
-@dataclass
+@dataclass(slots=True)
 class ColorConfig:
     enabled: bool = False
     num_colors: int = 1  # 1-6 colors for multi-color printing
@@ -42,16 +62,17 @@ class ColorConfig:
     layer_thickness_mm: float = 2.0  # Thickness of color layers in mm
 
 
-@dataclass
+@dataclass(slots=True)
 class TerrainConfig:
     resolution_meters: int = 30
+    fetch_decimation: int = 1  # Fetch every Nth point and interpolate the rest
     vertical_exaggeration: float = 2.0
     base_thickness_mm: float = 5.0
     height_stepping: HeightSteppingConfig = None
     colors: ColorConfig = None
 
 
-@dataclass
+@dataclass(slots=True)
 class Config:
     location: LocationConfig
     output: OutputConfig
@@ -60,7 +81,7 @@ class Config:
     @classmethod
     def from_yaml(cls, yaml_path: str) -> 'Config':
         with open(yaml_path, 'r') as f:
-            data = yaml.safe_load(f)
+            data = yaml.load(f, Loader=_YamlLoader)
         
         return cls.from_dict(data)
     
@@ -79,27 +100,18 @@ class Config:
         )
         
         output = OutputConfig(**data['output'])
-        
-        # Parse terrain config with optional nested configs
-        terrain_data = data['terrain'].copy()
-        
-        # Parse height stepping config
-        height_stepping = None
-        if 'height_stepping' in terrain_data:
-            height_stepping = HeightSteppingConfig(**terrain_data.pop('height_stepping'))
-        else:
-            height_stepping = HeightSteppingConfig()
-        
-        # Parse color config
-        colors = None
-        if 'colors' in terrain_data:
-            color_data = terrain_data.pop('colors')
-            colors = ColorConfig(**color_data)
-        else:
-            colors = ColorConfig()
-        
+
+        # Parse terrain config with optional nested configs; filter the
+        # nested keys instead of copying and mutating the caller's dict
+        terrain_data = data['terrain']
+
+        height_stepping = HeightSteppingConfig(**terrain_data['height_stepping']) \
+            if 'height_stepping' in terrain_data else HeightSteppingConfig()
+        colors = ColorConfig(**terrain_data['colors']) \
+            if 'colors' in terrain_data else ColorConfig()
+
         terrain = TerrainConfig(
-            **terrain_data,
+            **{k: v for k, v in terrain_data.items() if k not in ('height_stepping', 'colors')},
             height_stepping=height_stepping,
             colors=colors
         )
@@ -135,7 +147,9 @@ class Config:
             if self.terrain.height_stepping.step_height_mm <= 0:
                 raise ValueError("Step height must be positive")
         
+        if self.terrain.fetch_decimation < 1:
+            raise ValueError("fetch_decimation must be at least 1")
+
         # Validate output format
-        valid_formats = ["stl", "3mf", "amf", "obj"]
-        if self.output.format.lower() not in valid_formats:
-            raise ValueError(f"Output format must be one of: {valid_formats}")
\ No newline at end of file
+        if self.output.format.lower() not in _VALID_FORMATS:
+            raise ValueError(f"Output format must be one of: {sorted(_VALID_FORMATS)}")
\ No newline at end of file
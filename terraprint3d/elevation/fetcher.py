@@ -1,6 +1,10 @@
+import json
+import math
+import time
 import requests
 import numpy as np
 import googlemaps
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from typing import Tuple, Optional
 from terraprint3d.config.parser import BoundsConfig
 from terraprint3d.cache import ElevationCache
@@ -11,9 +15,25 @@ class ElevationFetcher:
         self.google_client = googlemaps.Client(key=google_api_key) if google_api_key else None
         self.open_elevation_url = "https://api.open-elevation.com/api/v1/lookup"
         self.cache = ElevationCache() if cache_enabled else None
+        # Concurrent batches for open-elevation; Google's client handles
+        # its own rate limiting so its batches stay sequential
+        self.max_workers = 4
+        self.max_retries = 3
+        # Persistent session so batches reuse TCP/TLS connections instead
+        # of paying the handshake cost on every request
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=8)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
     
-    def fetch_elevation_grid(self, bounds: BoundsConfig, resolution_meters: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
-        """Fetch elevation data for the given bounds and return lat, lon, elevation grids."""
+    def fetch_elevation_grid(self, bounds: BoundsConfig, resolution_meters: int,
+                             fetch_decimation: int = 1) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Fetch elevation data for the given bounds and return lat, lon, elevation grids.
+
+        With ``fetch_decimation`` > 1, only every Nth point is requested
+        from the API and the rest are interpolated - terrain is smooth
+        enough that this cuts quota usage by roughly N squared.
+        """
         # Determine API source for caching
         api_source = "google" if self.google_client else "open_elevation"
         
@@ -24,111 +44,248 @@ class ElevationFetcher:
                 print(f"Using cached elevation data for {api_source} API")
                 return cached_data
         
-        # Calculate grid points based on resolution
+        # Calculate grid points based on resolution; longitude spacing
+        # depends on the latitude of the region being sampled
+        center_lat = (bounds.south + bounds.north) / 2
         lat_points = self._calculate_grid_points(bounds.south, bounds.north, resolution_meters, True)
-        lon_points = self._calculate_grid_points(bounds.west, bounds.east, resolution_meters, False)
+        lon_points = self._calculate_grid_points(bounds.west, bounds.east, resolution_meters, False, center_lat)
         
         # Create coordinate grids
         lon_grid, lat_grid = np.meshgrid(lon_points, lat_points)
-        elevation_grid = np.zeros_like(lat_grid)
-        
-        # Use Google Elevation API if available, otherwise fall back to open-elevation
-        print(f"Fetching elevation data from {api_source} API...")
-        if self.google_client:
-            elevation_grid = self._fetch_with_google(lat_grid, lon_grid)
+
+        # Near-point bounds yield at most 2x2 nearly identical samples;
+        # one center lookup covers them without a batch round-trip
+        if lat_points.size * lon_points.size <= 4:
+            print(f"Bounds smaller than one grid cell; using single {api_source} lookup")
+            center_elev = self._fetch_single_point(center_lat, (bounds.west + bounds.east) / 2)
+            elevation_grid = np.full(lat_grid.shape, center_elev)
+            if self.cache:
+                self.cache.cache_elevation_data(bounds, resolution_meters, api_source, lat_grid, lon_grid, elevation_grid)
+            return lat_grid, lon_grid, elevation_grid
+
+        # Reuse cached tiles from previous overlapping queries, fetching
+        # only the points no tile covers
+        missing_mask = None
+        if self.cache:
+            elevation_grid, missing_mask = self._fill_from_tiles(
+                bounds, resolution_meters, api_source, lat_points, lon_points)
+
+        if missing_mask is None or np.all(missing_mask):
+            print(f"Fetching elevation data from {api_source} API...")
+            if fetch_decimation > 1:
+                elevation_grid = self._fetch_decimated(lat_points, lon_points, fetch_decimation)
+            elif self.google_client:
+                elevation_grid = self._fetch_with_google(lat_grid, lon_grid)
+            else:
+                elevation_grid = self._fetch_with_open_elevation(lat_grid, lon_grid)
+        elif np.any(missing_mask):
+            n_missing = int(np.count_nonzero(missing_mask))
+            print(f"Fetching {n_missing} uncached points from {api_source} API...")
+            missing_lat = lat_grid[missing_mask]
+            missing_lon = lon_grid[missing_mask]
+            if self.google_client:
+                elevation_grid[missing_mask] = self._fetch_with_google(missing_lat, missing_lon)
+            else:
+                elevation_grid[missing_mask] = self._fetch_with_open_elevation(missing_lat, missing_lon)
         else:
-            elevation_grid = self._fetch_with_open_elevation(lat_grid, lon_grid)
-        
+            print(f"Assembled elevation data from cached {api_source} tiles")
+
         # Cache the results
         if self.cache:
             print("Caching elevation data for future use...")
             self.cache.cache_elevation_data(bounds, resolution_meters, api_source, lat_grid, lon_grid, elevation_grid)
-        
+            self._store_tiles(resolution_meters, api_source, lat_points, lon_points, elevation_grid)
+
         return lat_grid, lon_grid, elevation_grid
+
+    def _fetch_single_point(self, lat: float, lon: float) -> float:
+        """Fetch elevation for one point."""
+        if self.google_client:
+            results = self.google_client.elevation([{'lat': lat, 'lng': lon}])
+            return float(results[0]['elevation'])
+        return float(self._post_open_elevation_batch(np.array([lat]), np.array([lon]))[0])
+
+    def _fetch_decimated(self, lat_points: np.ndarray, lon_points: np.ndarray, decimation: int) -> np.ndarray:
+        """Fetch a decimated grid and interpolate it to full resolution."""
+        from scipy.ndimage import zoom
+
+        coarse_lat = np.linspace(lat_points[0], lat_points[-1], max(2, -(-lat_points.size // decimation)))
+        coarse_lon = np.linspace(lon_points[0], lon_points[-1], max(2, -(-lon_points.size // decimation)))
+        coarse_lon_grid, coarse_lat_grid = np.meshgrid(coarse_lon, coarse_lat)
+
+        print(f"Decimated fetch: {coarse_lat.size}x{coarse_lon.size} of {lat_points.size}x{lon_points.size} points")
+        if self.google_client:
+            coarse_elev = self._fetch_with_google(coarse_lat_grid, coarse_lon_grid)
+        else:
+            coarse_elev = self._fetch_with_open_elevation(coarse_lat_grid, coarse_lon_grid)
+
+        # Cubic needs at least 4 samples per axis; degrade gracefully
+        order = 3 if min(coarse_elev.shape) >= 4 else 1
+        return zoom(coarse_elev,
+                    (lat_points.size / coarse_elev.shape[0], lon_points.size / coarse_elev.shape[1]),
+                    order=order, mode='nearest')
+
+    def _fill_from_tiles(self, bounds: BoundsConfig, resolution_meters: int, api_source: str,
+                         lat_points: np.ndarray, lon_points: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Assemble as much of the grid as possible from cached tiles.
+
+        Returns the partially filled elevation grid and a boolean mask of
+        points that still need to be fetched from the API.
+        """
+        tile_deg = ElevationCache.TILE_SIZE_DEGREES
+        elevation_grid = np.zeros((lat_points.size, lon_points.size))
+        missing_mask = np.ones(elevation_grid.shape, dtype=bool)
+
+        # Accept cached samples within three-quarters of a grid step
+        lat_tol = 0.75 * (lat_points[1] - lat_points[0]) if lat_points.size > 1 else tile_deg
+        lon_tol = 0.75 * (lon_points[1] - lon_points[0]) if lon_points.size > 1 else tile_deg
+
+        for tile_i in range(int(np.floor(bounds.south / tile_deg)), int(np.floor(bounds.north / tile_deg)) + 1):
+            for tile_j in range(int(np.floor(bounds.west / tile_deg)), int(np.floor(bounds.east / tile_deg)) + 1):
+                tile = self.cache.get_tile(tile_i, tile_j, resolution_meters, api_source)
+                if tile is None:
+                    continue
+
+                tile_lat, tile_lon, tile_elev = tile
+                lat_idx, lat_ok = self._nearest_indices(tile_lat, lat_points, lat_tol)
+                lon_idx, lon_ok = self._nearest_indices(tile_lon, lon_points, lon_tol)
+
+                rows = np.flatnonzero(lat_ok)
+                cols = np.flatnonzero(lon_ok)
+                if rows.size == 0 or cols.size == 0:
+                    continue
+
+                elevation_grid[np.ix_(rows, cols)] = tile_elev[np.ix_(lat_idx[rows], lon_idx[cols])]
+                missing_mask[np.ix_(rows, cols)] = False
+
+        return elevation_grid, missing_mask
+
+    def _store_tiles(self, resolution_meters: int, api_source: str,
+                     lat_points: np.ndarray, lon_points: np.ndarray, elevation_grid: np.ndarray) -> None:
+        """Slice a fetched grid into fixed tiles for reuse by later queries."""
+        tile_deg = ElevationCache.TILE_SIZE_DEGREES
+        lat_tiles = np.floor(lat_points / tile_deg).astype(int)
+        lon_tiles = np.floor(lon_points / tile_deg).astype(int)
+
+        for tile_i in np.unique(lat_tiles):
+            rows = np.flatnonzero(lat_tiles == tile_i)
+            for tile_j in np.unique(lon_tiles):
+                cols = np.flatnonzero(lon_tiles == tile_j)
+                self.cache.put_tile(tile_i, tile_j, resolution_meters, api_source,
+                                    lat_points[rows], lon_points[cols],
+                                    elevation_grid[np.ix_(rows, cols)])
+
+    @staticmethod
+    def _nearest_indices(sorted_points: np.ndarray, queries: np.ndarray, tolerance: float) -> Tuple[np.ndarray, np.ndarray]:
+        """Find the nearest sorted sample for each query point.
+
+        Returns the nearest indices and a mask of queries within tolerance.
+        """
+        if sorted_points.size == 0:
+            return np.zeros(queries.shape, dtype=int), np.zeros(queries.shape, dtype=bool)
+
+        idx = np.searchsorted(sorted_points, queries)
+        idx = np.clip(idx, 1, sorted_points.size - 1) if sorted_points.size > 1 else np.zeros(queries.shape, dtype=int)
+        left = np.abs(queries - sorted_points[idx - 1])
+        right = np.abs(sorted_points[idx] - queries)
+        nearest = np.where(left <= right, idx - 1, idx)
+        within = np.abs(sorted_points[nearest] - queries) <= tolerance
+        return nearest, within
     
     def _fetch_with_google(self, lat_grid: np.ndarray, lon_grid: np.ndarray) -> np.ndarray:
         """Fetch elevation data using Google Elevation API."""
-        elevation_grid = np.zeros_like(lat_grid)
-        
+        # Flatten the grids once; batch slicing by index avoids building
+        # per-cell dicts for the whole grid up front
+        flat_lat = lat_grid.ravel()
+        flat_lon = lon_grid.ravel()
+        n = flat_lat.size
+        # Every cell is written below, so skip the zeros() memset; failed
+        # batches are zeroed explicitly to keep the old error semantics
+        flat_elev = np.empty(n, dtype=np.float32)
+
         # Google API supports up to 512 locations per request
         batch_size = 500
-        locations = []
-        
-        for i in range(lat_grid.shape[0]):
-            for j in range(lat_grid.shape[1]):
-                locations.append({
-                    'lat': lat_grid[i, j],
-                    'lng': lon_grid[i, j],
-                    'i': i,
-                    'j': j
-                })
-        
+
         # Process in batches
-        for batch_start in range(0, len(locations), batch_size):
-            batch = locations[batch_start:batch_start + batch_size]
-            batch_coords = [{'lat': loc['lat'], 'lng': loc['lng']} for loc in batch]
-            
+        for start in range(0, n, batch_size):
+            lat_slice = flat_lat[start:start + batch_size]
+            lon_slice = flat_lon[start:start + batch_size]
+            batch_coords = [{'lat': float(la), 'lng': float(lo)} for la, lo in zip(lat_slice, lon_slice)]
+
             try:
                 results = self.google_client.elevation(batch_coords)
-                
-                for loc, result in zip(batch, results):
-                    elevation_grid[loc['i'], loc['j']] = result['elevation']
-                    
+                flat_elev[start:start + len(results)] = [result['elevation'] for result in results]
             except Exception as e:
                 print(f"Warning: Failed to fetch Google elevation batch: {e}")
-                # Fill with zeros on error
-                for loc in batch:
-                    elevation_grid[loc['i'], loc['j']] = 0
-        
-        return elevation_grid
-    
+                flat_elev[start:start + batch_size] = 0.0
+
+        return flat_elev.reshape(lat_grid.shape)
+
     def _fetch_with_open_elevation(self, lat_grid: np.ndarray, lon_grid: np.ndarray) -> np.ndarray:
         """Fetch elevation data using open-elevation API."""
-        elevation_grid = np.zeros_like(lat_grid)
-        
+        flat_lat = lat_grid.ravel()
+        flat_lon = lon_grid.ravel()
+        n = flat_lat.size
+        flat_elev = np.empty(n, dtype=np.float32)
+
         # Open elevation supports smaller batches
         batch_size = 100
-        locations = []
-        
-        for i in range(lat_grid.shape[0]):
-            for j in range(lat_grid.shape[1]):
-                locations.append({
-                    'latitude': lat_grid[i, j],
-                    'longitude': lon_grid[i, j],
-                    'i': i,
-                    'j': j
-                })
-        
-        # Process in batches
-        for batch_start in range(0, len(locations), batch_size):
-            batch = locations[batch_start:batch_start + batch_size]
-            batch_coords = [{'latitude': loc['latitude'], 'longitude': loc['longitude']} for loc in batch]
-            
+        chunks = [(start, flat_lat[start:start + batch_size], flat_lon[start:start + batch_size])
+                  for start in range(0, n, batch_size)]
+
+        # Batches are independent and I/O-bound, so dispatch them in
+        # parallel with a small concurrency cap to avoid rate limiting
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {executor.submit(self._post_open_elevation_batch, lat_slice, lon_slice): start
+                       for start, lat_slice, lon_slice in chunks}
+
+            for future in as_completed(futures):
+                start = futures[future]
+                try:
+                    elevations = future.result()
+                    flat_elev[start:start + len(elevations)] = elevations
+                except requests.RequestException as e:
+                    print(f"Warning: Failed to fetch elevation batch: {e}")
+                    flat_elev[start:start + batch_size] = 0.0
+
+        return flat_elev.reshape(lat_grid.shape)
+
+    def _post_open_elevation_batch(self, lat_slice: np.ndarray, lon_slice: np.ndarray) -> list:
+        """POST a single batch to open-elevation, retrying on transient errors."""
+        batch_coords = [{'latitude': float(la), 'longitude': float(lo)} for la, lo in zip(lat_slice, lon_slice)]
+        # Serialize once up front with compact separators; retries then
+        # resend the same bytes instead of re-encoding the payload
+        payload = json.dumps({'locations': batch_coords}, separators=(',', ':')).encode()
+
+        last_error = None
+        for attempt in range(self.max_retries):
             try:
-                response = requests.post(self.open_elevation_url, json={'locations': batch_coords})
+                response = self.session.post(self.open_elevation_url, data=payload,
+                                             headers={'Content-Type': 'application/json'}, timeout=30)
+                if response.status_code == 429 or response.status_code >= 500:
+                    # Rate limited or server error - back off and retry
+                    time.sleep(2 ** attempt)
+                    continue
                 response.raise_for_status()
-                results = response.json()['results']
-                
-                for loc, result in zip(batch, results):
-                    elevation_grid[loc['i'], loc['j']] = result['elevation']
-                    
+                return [result['elevation'] for result in response.json()['results']]
             except requests.RequestException as e:
-                print(f"Warning: Failed to fetch elevation batch: {e}")
-                # Fill with zeros on error
-                for loc in batch:
-                    elevation_grid[loc['i'], loc['j']] = 0
-        
-        return elevation_grid
+                last_error = e
+                time.sleep(2 ** attempt)
+
+        if last_error is not None:
+            raise last_error
+        raise requests.RequestException("Exhausted retries fetching elevation batch")
     
-    def _calculate_grid_points(self, start: float, end: float, resolution_meters: int, is_latitude: bool) -> np.ndarray:
+    def _calculate_grid_points(self, start: float, end: float, resolution_meters: int, is_latitude: bool,
+                               center_lat: float = 0.0) -> np.ndarray:
         """Calculate grid points based on resolution in meters."""
         # Approximate conversion from meters to degrees
         if is_latitude:
             # 1 degree latitude ≈ 111,320 meters
             resolution_degrees = resolution_meters / 111320.0
         else:
-            # 1 degree longitude varies by latitude, using rough approximation
-            resolution_degrees = resolution_meters / 85000.0  # Conservative estimate
-        
+            # 1 degree longitude ≈ 111,320 * cos(latitude) meters
+            resolution_degrees = resolution_meters / (111320.0 * math.cos(math.radians(center_lat)))
+
         num_points = max(2, int((end - start) / resolution_degrees) + 1)
         return np.linspace(start, end, num_points)
\ No newline at end of file
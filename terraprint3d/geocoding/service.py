@@ -1,39 +1,88 @@
 import googlemaps
+import functools
+import hashlib
+import json
 import math
+from pathlib import Path
 from typing import Tuple
 from terraprint3d.config.parser import BoundsConfig
 
 
+# Degrees of latitude per kilometer on a spherical earth, folded into one
+# constant so bounds conversion avoids redundant divisions per call
+_DEG_PER_KM = (1.0 / 6371.0) * (180.0 / math.pi)
+
+# Clients keyed by API-key hash so the memoized lookup below never holds
+# the raw key and is shared by every service built with the same key
+_clients = {}
+
+
+@functools.lru_cache(maxsize=1024)
+def _geocode_cached(api_key_hash: str, address: str) -> Tuple[float, float]:
+    """Memoized geocode lookup, keyed on a hash of the API key plus address."""
+    result = _clients[api_key_hash].geocode(address)
+    if not result:
+        raise ValueError(f"Could not geocode address: {address}")
+
+    location = result[0]['geometry']['location']
+    return location['lat'], location['lng']
+
+
 class GeocodingService:
-    def __init__(self, api_key: str):
+    def __init__(self, api_key: str, cache_file: str = "data/geocoding_cache.json"):
         self.client = googlemaps.Client(key=api_key)
-    
+        # Key is hashed so the on-disk store never contains the secret
+        self._api_key_hash = hashlib.blake2b(api_key.encode(), digest_size=16).hexdigest()
+        _clients[self._api_key_hash] = self.client
+        self._cache_file = Path(cache_file)
+        self._disk_cache = self._load_disk_cache()
+
+    def _load_disk_cache(self) -> dict:
+        if self._cache_file.exists():
+            try:
+                with open(self._cache_file) as f:
+                    return json.load(f)
+            except Exception as e:
+                print(f"Warning: Failed to load geocoding cache: {e}")
+        return {}
+
+    def _save_disk_cache(self) -> None:
+        try:
+            self._cache_file.parent.mkdir(parents=True, exist_ok=True)
+            with open(self._cache_file, 'w') as f:
+                json.dump(self._disk_cache, f)
+        except Exception as e:
+            print(f"Warning: Failed to save geocoding cache: {e}")
+
     def address_to_coordinates(self, address: str) -> Tuple[float, float]:
-        """Convert address to lat/lon coordinates."""
-        result = self.client.geocode(address)
-        if not result:
-            raise ValueError(f"Could not geocode address: {address}")
-        
-        location = result[0]['geometry']['location']
-        return location['lat'], location['lng']
-    
+        """Convert address to lat/lon coordinates.
+
+        Results are memoized in-process and persisted to a small JSON store
+        so repeat runs against the same address skip the API entirely.
+        """
+        cached = self._disk_cache.get(address)
+        if cached is not None:
+            return cached[0], cached[1]
+
+        lat, lon = _geocode_cached(self._api_key_hash, address)
+        self._disk_cache[address] = [lat, lon]
+        self._save_disk_cache()
+        return lat, lon
+
     def coordinates_to_bounds(self, lat: float, lon: float, radius_km: float) -> BoundsConfig:
         """Convert center coordinates and radius to bounding box."""
-        # Earth's radius in kilometers
-        earth_radius_km = 6371.0
-        
-        # Convert radius to degrees
-        lat_delta = (radius_km / earth_radius_km) * (180 / math.pi)
-        lon_delta = (radius_km / earth_radius_km) * (180 / math.pi) / math.cos(math.radians(lat))
-        
+        # Convert radius to degrees; longitude shrinks with latitude
+        lat_delta = radius_km * _DEG_PER_KM
+        lon_delta = lat_delta / math.cos(math.radians(lat))
+
         return BoundsConfig(
             north=lat + lat_delta,
             south=lat - lat_delta,
             east=lon + lon_delta,
             west=lon - lon_delta
         )
-    
+
     def address_to_bounds(self, address: str, radius_km: float) -> BoundsConfig:
         """Convert address and radius to bounding box."""
         lat, lon = self.address_to_coordinates(address)
-        return self.coordinates_to_bounds(lat, lon, radius_km)
\ No newline at end of file
+        return self.coordinates_to_bounds(lat, lon, radius_km)
@@ -1,151 +1,160 @@
+import functools
 import numpy as np
 import trimesh
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
 from terraprint3d.config.parser import Config
+from terraprint3d.mesh.generator import MeshGenerator
+
+# Fallback colors for unknown color names: the 60-degree hue rotation
+# only ever produces these six fully saturated RGBA values
+_FALLBACK_HUES = (
+    (255, 0, 0, 255),
+    (255, 255, 0, 255),
+    (0, 255, 0, 255),
+    (0, 255, 255, 255),
+    (0, 0, 255, 255),
+    (255, 0, 255, 255),
+)
+
+_COLOR_MAP = {
+    'red': (255, 0, 0, 255),
+    'green': (0, 255, 0, 255),
+    'blue': (0, 0, 255, 255),
+    'yellow': (255, 255, 0, 255),
+    'orange': (255, 165, 0, 255),
+    'purple': (128, 0, 128, 255),
+    'cyan': (0, 255, 255, 255),
+    'magenta': (255, 0, 255, 255),
+    'brown': (139, 69, 19, 255),
+    'pink': (255, 192, 203, 255),
+    'navy': (0, 0, 128, 255),
+    'dark': (64, 64, 64, 255),
+    'light': (192, 192, 192, 255),
+    'white': (255, 255, 255, 255),
+    'black': (0, 0, 0, 255)
+}
+
+
+@functools.lru_cache(maxsize=16)
+def _build_palette(color_names: Optional[Tuple[str, ...]], num_colors: int) -> np.ndarray:
+    """RGBA palette for the given config, memoized across exporter instances.
+
+    Tiled exports construct a fresh exporter per tile with an identical
+    config; the palette only depends on these two hashable values, so
+    build it once and hand out the same read-only array.
+    """
+    if color_names:
+        colors = []
+        for color_name in color_names:
+            rgba = _COLOR_MAP.get(color_name.lower())
+            if rgba is None:
+                # Default to a generated color
+                rgba = _FALLBACK_HUES[len(colors) % len(_FALLBACK_HUES)]
+            colors.append(rgba)
+        palette = np.array(colors, dtype=np.uint8)
+    else:
+        palette = _elevation_gradient(num_colors)
+
+    palette.flags.writeable = False
+    return palette
+
+
+def _elevation_gradient(num_colors: int) -> np.ndarray:
+    """Generate default terrain colors (blue to red gradient)."""
+    # Blue to green to yellow to red gradient, computed piecewise
+    # over the whole ratio vector instead of branchy scalar math
+    ratio = np.linspace(0, 1, num_colors) if num_colors > 1 else np.zeros(1)
+    low = ratio < 0.33
+    mid = (ratio >= 0.33) & (ratio < 0.66)
+
+    r = np.where(low, 0, np.where(mid, 255 * (ratio - 0.33) / 0.33, 255))
+    g = np.where(low, 255 * ratio / 0.33, np.where(mid, 255, 255 * (1 - (ratio - 0.66) / 0.34)))
+    b = np.where(low, 255 * (1 - ratio / 0.33), 0)
+
+    rgba = np.stack([r, g, b, np.full_like(r, 255)], axis=1)
+    return np.clip(rgba, 0, 255).astype(np.uint8)
 
 
 class ColoredMeshExporter:
     def __init__(self, config: Config):
         self.config = config
-        self.color_palette = self._get_color_palette()
+        self._mesh_gen = MeshGenerator(config)
+        # Palette arrays are memoized module-wide by config values
+        names = config.terrain.colors.color_names
+        self._palette_arr = _build_palette(tuple(names) if names else None,
+                                           config.terrain.colors.num_colors)
+        self.color_palette = self._palette_arr
+        # Packed RGBA view so the gather issues one 32-bit store per
+        # vertex instead of four byte stores
+        self._palette_u32 = self._palette_arr.view(np.uint32).ravel()
     
     def create_colored_mesh(self, lat_grid: np.ndarray, lon_grid: np.ndarray, 
                            elevation_grid: np.ndarray) -> trimesh.Trimesh:
         """Create a single mesh with vertex colors based on elevation."""
-        
-        from terraprint3d.mesh.generator import MeshGenerator
-        mesh_gen = MeshGenerator(self.config)
-        
-        # Generate the base mesh
+
+        # Generate the base mesh with the cached generator
+        mesh_gen = self._mesh_gen
         mesh = mesh_gen.generate_mesh(lat_grid, lon_grid, elevation_grid)
         
         if not self.config.terrain.colors.enabled:
             return mesh
-        
-        # Apply vertex colors based on elevation
-        vertex_colors = self._calculate_vertex_colors(mesh.vertices, elevation_grid, lat_grid, lon_grid)
+
+        # STL carries no color data, so building per-vertex colors for it
+        # is pure wasted bandwidth
+        if self.config.output.format.lower() == 'stl':
+            return mesh
+
+        # Apply vertex colors based on elevation, reusing the z extent
+        # the generator already computed
+        vertex_colors = self._calculate_vertex_colors(
+            mesh.vertices, elevation_grid, lat_grid, lon_grid,
+            z_min=mesh_gen.last_z_min, z_max=mesh_gen.last_z_max)
         mesh.visual.vertex_colors = vertex_colors
         
         return mesh
     
-    def _get_color_palette(self) -> List[Tuple[int, int, int, int]]:
-        """Get RGBA color palette for elevation zones."""
-        if self.config.terrain.colors.color_names:
-            colors = []
-            color_map = {
-                'red': (255, 0, 0, 255),
-                'green': (0, 255, 0, 255),
-                'blue': (0, 0, 255, 255),
-                'yellow': (255, 255, 0, 255),
-                'orange': (255, 165, 0, 255),
-                'purple': (128, 0, 128, 255),
-                'cyan': (0, 255, 255, 255),
-                'magenta': (255, 0, 255, 255),
-                'brown': (139, 69, 19, 255),
-                'pink': (255, 192, 203, 255),
-                'navy': (0, 0, 128, 255),
-                'dark': (64, 64, 64, 255),
-                'light': (192, 192, 192, 255),
-                'white': (255, 255, 255, 255),
-                'black': (0, 0, 0, 255)
-            }
-            
-            for color_name in self.config.terrain.colors.color_names:
-                color_name_lower = color_name.lower()
-                if color_name_lower in color_map:
-                    colors.append(color_map[color_name_lower])
-                else:
-                    # Default to a generated color
-                    colors.append(self._generate_color(len(colors)))
-            
-            return colors
-        else:
-            # Generate default elevation-based colors
-            return self._generate_elevation_colors()
-    
-    def _generate_elevation_colors(self) -> List[Tuple[int, int, int, int]]:
-        """Generate default terrain colors (blue to red gradient)."""
-        num_colors = self.config.terrain.colors.num_colors
-        colors = []
-        
-        # Create a gradient from blue (low) to red (high)
-        for i in range(num_colors):
-            # Interpolate between blue and red
-            ratio = i / (num_colors - 1) if num_colors > 1 else 0
-            
-            # Blue to green to yellow to red gradient
-            if ratio < 0.33:
-                # Blue to green
-                r = int(0 * (1 - ratio/0.33))
-                g = int(255 * (ratio/0.33))
-                b = int(255 * (1 - ratio/0.33))
-            elif ratio < 0.66:
-                # Green to yellow
-                r = int(255 * ((ratio - 0.33)/0.33))
-                g = 255
-                b = 0
-            else:
-                # Yellow to red
-                r = 255
-                g = int(255 * (1 - (ratio - 0.66)/0.34))
-                b = 0
-            
-            colors.append((r, g, b, 255))
-        
-        return colors
-    
-    def _generate_color(self, index: int) -> Tuple[int, int, int, int]:
-        """Generate a color for unknown color names."""
-        # Simple hue rotation
-        hue = (index * 60) % 360
-        return self._hsv_to_rgb(hue, 1.0, 1.0)
-    
-    def _hsv_to_rgb(self, h: float, s: float, v: float) -> Tuple[int, int, int, int]:
-        """Convert HSV to RGB."""
-        import colorsys
-        r, g, b = colorsys.hsv_to_rgb(h/360.0, s, v)
-        return (int(r*255), int(g*255), int(b*255), 255)
-    
-    def _calculate_vertex_colors(self, vertices: np.ndarray, elevation_grid: np.ndarray, 
-                                lat_grid: np.ndarray, lon_grid: np.ndarray) -> np.ndarray:
-        """Calculate colors for each vertex based on elevation."""
-        
-        # Get elevation range from the original grid
-        min_elev = np.min(elevation_grid)
-        max_elev = np.max(elevation_grid)
-        elev_range = max_elev - min_elev
-        
-        if elev_range == 0:
+    def _calculate_vertex_colors(self, vertices: np.ndarray, elevation_grid: np.ndarray,
+                                lat_grid: np.ndarray, lon_grid: np.ndarray,
+                                z_min: float = None, z_max: float = None) -> np.ndarray:
+        """Calculate colors for each vertex based on elevation.
+
+        Pass ``z_min``/``z_max`` (in the same frame as the vertices) when
+        the caller already knows the surface extent to skip two full
+        passes over the vertex array.
+        """
+
+        # Get elevation range from the original grid in a single pass
+        if np.ptp(elevation_grid) == 0:
             # Flat terrain - use first color
-            color = self.color_palette[0]
-            return np.full((len(vertices), 4), color, dtype=np.uint8)
-        
+            return np.broadcast_to(self._palette_arr[0], (len(vertices), 4)).copy()
+
         # Get the Z coordinates from vertices (subtract base thickness)
         z_coords = vertices[:, 2] - self.config.terrain.base_thickness_mm
-        
+
         # Normalize Z coordinates to elevation range
-        z_min = np.min(z_coords)
-        z_max = np.max(z_coords)
-        z_range = z_max - z_min
-        
-        if z_range == 0:
+        if z_min is None or z_max is None:
+            z_min = np.min(z_coords)
+            z_max = np.max(z_coords)
+        else:
+            # The cached extent covers only the surface; the printable
+            # solid also has its base plane at z=0, which the rescan
+            # above would include. Fold it in so both branches place the
+            # zone boundaries identically
+            z_min = min(z_min, 0.0) - self.config.terrain.base_thickness_mm
+            z_max -= self.config.terrain.base_thickness_mm
+
+        if z_max - z_min == 0:
             # All at same height
-            color = self.color_palette[0]
-            return np.full((len(vertices), 4), color, dtype=np.uint8)
-        
-        # Map Z coordinates to 0-1 range, then to color zones
-        normalized_z = (z_coords - z_min) / z_range
-        
-        # Calculate color zones
+            return np.broadcast_to(self._palette_arr[0], (len(vertices), 4)).copy()
+
+        # Assign zones by binary search against the boundary heights and
+        # gather packed RGBA words; works unchanged for non-uniform zone
+        # boundaries and skips the normalization pass over z entirely
         num_colors = len(self.color_palette)
-        zone_indices = np.clip(np.floor(normalized_z * num_colors).astype(int), 0, num_colors - 1)
-        
-        # Apply colors
-        vertex_colors = np.zeros((len(vertices), 4), dtype=np.uint8)
-        for i, zone_idx in enumerate(zone_indices):
-            vertex_colors[i] = self.color_palette[zone_idx]
-        
-        return vertex_colors
+        boundaries = np.linspace(z_min, z_max, num_colors + 1)[1:-1]
+        zone_indices = np.searchsorted(boundaries, z_coords)
+
+        return self._palette_u32[zone_indices].view(np.uint8).reshape(-1, 4)
     
     def export_colored_mesh(self, mesh: trimesh.Trimesh, filename: str) -> str:
         """Export mesh with colors in the specified format."""
@@ -159,10 +168,17 @@ class ColoredMeshExporter:
         
         try:
             if format_ext == '3mf':
-                # Try to export with colors for 3MF
-                print(f"Exporting 3MF with {len(mesh.visual.vertex_colors)} vertex colors")
-                print(f"Color range: {mesh.visual.vertex_colors.min()} to {mesh.visual.vertex_colors.max()}")
-                mesh.export(filename)
+                # Stream 3MF straight from the mesh buffers; trimesh's
+                # exporter would copy vertices, faces and colors again.
+                # len(vertices) is a cheap shape read - don't touch the
+                # color buffer just for logging
+                print(f"Exporting colored 3MF with {len(mesh.vertices)} vertices")
+                try:
+                    self._export_3mf_direct(mesh.vertices, mesh.faces,
+                                            np.asarray(mesh.visual.vertex_colors), filename)
+                except Exception as e:
+                    print(f"Warning: Direct 3MF write failed ({e}), using trimesh exporter")
+                    mesh.export(filename)
                 return filename
             
             elif format_ext == 'amf':
@@ -193,6 +209,58 @@ class ColoredMeshExporter:
             mesh_copy.export(filename)
             return filename
     
+    def _export_3mf_direct(self, vertices: np.ndarray, faces: np.ndarray,
+                           colors: np.ndarray, filename: str) -> None:
+        """Write a colored 3MF archive directly from the mesh buffers.
+
+        Vertex and triangle elements are formatted straight from the
+        ndarrays into the zip stream, avoiding the full intermediate copy
+        trimesh's exporter builds. Colors go through the material
+        extension as a color group indexed per triangle corner.
+        """
+        import io
+        import zipfile
+
+        # Deduplicate vertex colors into a color group and index into it
+        colors_u32 = np.ascontiguousarray(colors[:, :4]).view(np.uint32).ravel()
+        unique_u32, color_indices = np.unique(colors_u32, return_inverse=True)
+        unique_rgba = unique_u32.view(np.uint8).reshape(-1, 4)
+
+        with zipfile.ZipFile(filename, 'w', zipfile.ZIP_DEFLATED) as zf:
+            zf.writestr('[Content_Types].xml',
+                        '<?xml version="1.0" encoding="UTF-8"?>\n'
+                        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+                        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+                        '<Default Extension="model" ContentType="application/vnd.ms-package.3dmanufacturing-3dmodel+xml"/>'
+                        '</Types>')
+            zf.writestr('_rels/.rels',
+                        '<?xml version="1.0" encoding="UTF-8"?>\n'
+                        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+                        '<Relationship Target="/3D/3dmodel.model" Id="rel0" '
+                        'Type="http://schemas.microsoft.com/3dmanufacturing/2013/01/3dmodel"/>'
+                        '</Relationships>')
+
+            with zf.open('3D/3dmodel.model', 'w') as raw:
+                out = io.TextIOWrapper(raw, encoding='utf-8', write_through=False)
+                out.write('<?xml version="1.0" encoding="UTF-8"?>\n'
+                          '<model unit="millimeter" xml:lang="en-US" '
+                          'xmlns="http://schemas.microsoft.com/3dmanufacturing/core/2015/02" '
+                          'xmlns:m="http://schemas.microsoft.com/3dmanufacturing/material/2015/02">\n'
+                          '<resources>\n<m:colorgroup id="1">\n')
+                for r, g, b, a in unique_rgba:
+                    out.write(f'<m:color color="#{r:02X}{g:02X}{b:02X}{a:02X}"/>\n')
+                out.write('</m:colorgroup>\n'
+                          '<object id="2" type="model" pid="1" pindex="0">\n<mesh>\n<vertices>\n')
+                np.savetxt(out, vertices, fmt='<vertex x="%.6f" y="%.6f" z="%.6f"/>')
+                out.write('</vertices>\n<triangles>\n')
+                tri = np.hstack([faces, color_indices[faces]])
+                np.savetxt(out, tri,
+                           fmt='<triangle v1="%d" v2="%d" v3="%d" p1="%d" p2="%d" p3="%d"/>')
+                out.write('</triangles>\n</mesh>\n</object>\n</resources>\n'
+                          '<build><item objectid="2"/></build>\n</model>\n')
+                out.flush()
+                out.detach()
+
     def save_color_reference(self, filename: str) -> str:
         """Save a color reference chart showing elevation zones and colors."""
         
@@ -204,30 +272,26 @@ class ColoredMeshExporter:
         # Create color reference
         fig, ax = plt.subplots(figsize=(8, 6))
         
-        colors = self.color_palette
-        color_names = self.config.terrain.colors.color_names or [f"Zone {i+1}" for i in range(len(colors))]
-        
-        # Convert colors to matplotlib format (0-1 range)
-        mpl_colors = [(r/255, g/255, b/255) for r, g, b, a in colors]
-        
-        # Create color bars
-        y_positions = range(len(colors))
-        bars = ax.barh(y_positions, [1] * len(colors), color=mpl_colors, height=0.8)
-        
+        num_zones = len(self.color_palette)
+        color_names = self.config.terrain.colors.color_names or [f"Zone {i+1}" for i in range(num_zones)]
+
+        # Draw the whole palette as one image artist instead of a bar
+        # per zone; origin='lower' keeps the lowest elevation at bottom
+        ax.imshow(self._palette_arr[:, None, :3], aspect='auto', origin='lower')
+
         # Add labels
-        ax.set_yticks(y_positions)
+        ax.set_yticks(range(num_zones))
         ax.set_yticklabels([f"{name}\n(Zone {i+1})" for i, name in enumerate(color_names)])
         ax.set_xlabel('Elevation (Low → High)')
         ax.set_title('Terrain Color Reference\n(Bottom = Lowest Elevation, Top = Highest)')
-        
+
         # Remove x-axis ticks
         ax.set_xticks([])
-        
+
         # Add elevation zone labels
         zone_labels = ['Lowest', 'Low', 'Medium', 'High', 'Higher', 'Highest']
-        for i, (bar, label) in enumerate(zip(bars, zone_labels[:len(colors)])):
-            ax.text(0.5, bar.get_y() + bar.get_height()/2, label, 
-                   ha='center', va='center', fontweight='bold', color='white')
+        for i, label in enumerate(zone_labels[:num_zones]):
+            ax.text(0, i, label, ha='center', va='center', fontweight='bold', color='white')
         
         plt.tight_layout()
         
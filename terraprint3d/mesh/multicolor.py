@@ -1,58 +1,139 @@
+import os
+import struct
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+
 import numpy as np
 import trimesh
+from trimesh.exchange.stl import export_stl
 from typing import List, Tuple, Dict
 from terraprint3d.config.parser import Config
 from terraprint3d.mesh.generator import MeshGenerator
 
 
+# Binary STL facet record layout (50 bytes, unpadded)
+_STL_RECORD = np.dtype([('normal', '<f4', 3), ('vertices', '<f4', (3, 3)), ('attributes', '<u2')])
+
+
+def _write_binary_stl(mesh: trimesh.Trimesh, filename: str) -> None:
+    """Write a binary STL by filling a memory-mapped facet record array.
+
+    The records go straight into the page cache instead of materializing
+    the whole file as an in-memory bytes object first, so peak memory
+    stays at one copy of the triangle data.
+    """
+    num_faces = len(mesh.faces)
+    with open(filename, 'wb') as f:
+        f.write(struct.pack('<80sI', b'terraprint3d', num_faces))
+        f.truncate(84 + num_faces * _STL_RECORD.itemsize)
+
+    if num_faces:
+        records = np.memmap(filename, dtype=_STL_RECORD, mode='r+', offset=84, shape=(num_faces,))
+        records['normal'] = mesh.face_normals
+        records['vertices'] = mesh.triangles
+        records['attributes'] = 0
+        records.flush()
+
+
+# Triangles of a closed quad prism as offsets into its 8 corner ids,
+# ordered [v00_top, v01_top, v10_top, v11_top, v00_bot, v01_bot, v10_bot,
+# v11_bot]: top 2, bottom 2 (reverse winding), then 4 walls x 2
+_QUAD_FACE_TEMPLATE = np.array([
+    [0, 1, 2], [1, 3, 2],
+    [4, 6, 5], [5, 6, 7],
+    [4, 0, 5], [0, 1, 5],
+    [5, 1, 7], [1, 3, 7],
+    [7, 3, 6], [3, 2, 6],
+    [6, 2, 4], [2, 0, 4],
+], dtype=np.int64)
+
+
 class MultiColorMeshGenerator(MeshGenerator):
-    def __init__(self, config: Config):
-        super().__init__(config)
+    def __init__(self, config: Config, validate_mesh: bool = False):
+        super().__init__(config, validate_mesh=validate_mesh)
         self.color_zones = []
+        # Resolved (and created) output directories, keyed by base filename
+        self._output_dir_cache: Dict[str, str] = {}
     
     def generate_multi_color_meshes(self, lat_grid: np.ndarray, lon_grid: np.ndarray, 
                                    elevation_grid: np.ndarray) -> Dict[str, trimesh.Trimesh]:
         """Generate separate meshes for each color zone."""
         
-        if not self.config.terrain.colors.enabled:
+        # Hoist the config attribute chains out of the generation path
+        terrain = self.config.terrain
+
+        if not terrain.colors.enabled:
             # Single color - return original mesh
             mesh = self.generate_mesh(lat_grid, lon_grid, elevation_grid)
             return {"terrain": mesh}
-        
+
         # Apply height stepping if enabled
-        if self.config.terrain.height_stepping.enabled:
+        if terrain.height_stepping.enabled:
             elevation_grid = self._apply_height_stepping(elevation_grid)
-        
+
+        # Millimeter printer-bed coordinates need nowhere near float64
+        # precision; float32 halves bandwidth through mesh construction
+        lat_grid = np.asarray(lat_grid, dtype=np.float32)
+        lon_grid = np.asarray(lon_grid, dtype=np.float32)
+
         # Convert to mesh coordinates first
         x_grid, y_grid = self._latlon_to_meters(lat_grid, lon_grid)
-        x_grid_norm, y_grid_norm, z_grid_norm = self._normalize_to_printer_bed(x_grid, y_grid, elevation_grid)
-        z_grid_norm *= self.config.terrain.vertical_exaggeration
-        z_grid_norm += self.config.terrain.base_thickness_mm
+        # Normalization works in place, so it needs a private copy rather
+        # than the caller's elevation grid; folding the vertical
+        # exaggeration into that copy is equivalent to applying it after
+        # normalization and saves a separate pass over the grid
+        z_grid = np.multiply(elevation_grid, np.float32(terrain.vertical_exaggeration), dtype=np.float32)
+        x_grid_norm, y_grid_norm, z_grid_norm = self._normalize_to_printer_bed(x_grid, y_grid, z_grid)
+        z_grid_norm += terrain.base_thickness_mm
         
         # Calculate color zones based on the normalized elevation
         color_zones = self._calculate_color_zones(z_grid_norm)
-        
+
         # Store grid dimensions
         self._grid_rows, self._grid_cols = x_grid_norm.shape
-        
-        # Generate meshes for each color zone
-        meshes = {}
+
+        # Regular lat/lon grids give row/column-separable coordinates, so
+        # every zone mesh can index broadcast views over the 1-D axes
+        # instead of dense per-zone reads of full x/y copies
+        if (np.array_equal(x_grid_norm[0], x_grid_norm[-1]) and
+                np.array_equal(y_grid_norm[:, 0], y_grid_norm[:, -1])):
+            shape = x_grid_norm.shape
+            x_grid_norm = np.broadcast_to(np.ascontiguousarray(x_grid_norm[0]), shape)
+            y_grid_norm = np.broadcast_to(np.ascontiguousarray(y_grid_norm[:, 0])[:, None], shape)
+        
+        # Classify every point into its zone once; per-zone populations
+        # come from a single bincount instead of a full-grid mask
+        # reduction per zone. The base zone (index 0) always has work.
+        zone_idx_grid = self._assign_zones_grid(z_grid_norm, color_zones)
+        zone_counts = np.bincount(zone_idx_grid.ravel(), minlength=len(color_zones))
+
+        # Collect the non-empty zones first, then generate their meshes
+        # concurrently - each zone is independent and the heavy NumPy work
+        # releases the GIL, mirroring the fetcher's thread pool
         color_names = self._get_color_names()
-        
-        for i, (zone_min, zone_max) in enumerate(color_zones):
+        tasks = []
+        for i in range(len(color_zones)):
             color_name = color_names[i] if i < len(color_names) else f"color_{i+1}"
-            
-            # Create mask for this elevation zone (using normalized heights)
-            zone_mask = (z_grid_norm >= zone_min) & (z_grid_norm <= zone_max)
-            
-            if not np.any(zone_mask):
+
+            if i > 0 and zone_counts[i] == 0:
                 continue  # Skip empty zones
-            
-            # Generate mesh for this zone
-            zone_mesh = self._generate_zone_mesh(x_grid_norm, y_grid_norm, z_grid_norm, zone_mask, zone_min)
-            
-            if zone_mesh is not None:
-                meshes[color_name] = zone_mesh
+
+            tasks.append((color_name, i))
+
+        meshes = {}
+        if tasks:
+            with ThreadPoolExecutor(max_workers=min(len(tasks), os.cpu_count() or 1)) as executor:
+                # The zone classification, table and index are passed down
+                # so nothing re-derives them from heights
+                futures = [
+                    executor.submit(self._generate_zone_mesh, x_grid_norm, y_grid_norm,
+                                    z_grid_norm, zone_idx_grid, color_zones, i)
+                    for _, i in tasks
+                ]
+                for (color_name, _), future in zip(tasks, futures):
+                    zone_mesh = future.result()
+                    if zone_mesh is not None:
+                        meshes[color_name] = zone_mesh
         
         # Validate for intersections
         # Validation disabled while fixing boundary approach
@@ -62,36 +143,54 @@ class MultiColorMeshGenerator(MeshGenerator):
     
     def _apply_height_stepping(self, elevation_grid: np.ndarray) -> np.ndarray:
         """Apply height stepping to elevation data."""
-        step_height = self.config.terrain.height_stepping.step_height_mm / self.config.terrain.vertical_exaggeration
-        
+        stepping = self.config.terrain.height_stepping
+        step_height = stepping.step_height_mm / self.config.terrain.vertical_exaggeration
+
         # Calculate steps
         min_elev = np.min(elevation_grid)
         max_elev = np.max(elevation_grid)
-        
-        # Create stepped elevation
-        stepped_grid = elevation_grid.copy()
-        
-        if self.config.terrain.height_stepping.smooth_transitions:
-            # Smooth stepping - gradual transitions
+
+        if stepping.smooth_transitions:
+            # Smooth stepping - snap each point to its step's midpoint in
+            # one digitize pass instead of a mask per step level
             num_steps = int((max_elev - min_elev) / step_height) + 1
             step_levels = np.linspace(min_elev, max_elev, num_steps)
-            
-            for i in range(len(step_levels) - 1):
-                mask = (elevation_grid >= step_levels[i]) & (elevation_grid < step_levels[i + 1])
-                stepped_grid[mask] = step_levels[i] + (step_levels[i + 1] - step_levels[i]) * 0.5
+
+            if len(step_levels) > 1:
+                bin_idx = np.digitize(elevation_grid, step_levels) - 1
+                bin_idx = np.clip(bin_idx, 0, len(step_levels) - 2)
+                stepped_grid = (0.5 * (step_levels[bin_idx] + step_levels[bin_idx + 1])).astype(elevation_grid.dtype, copy=False)
+                # The maximum falls outside every half-open step interval
+                # and keeps its original value, as before
+                stepped_grid[elevation_grid >= step_levels[-1]] = elevation_grid[elevation_grid >= step_levels[-1]]
+            else:
+                stepped_grid = elevation_grid.copy()
         else:
-            # Sharp stepping - discrete levels
-            stepped_grid = np.round((elevation_grid - min_elev) / step_height) * step_height + min_elev
+            # Sharp stepping - discrete levels, snapped with an in-place
+            # ufunc chain so one buffer serves the whole expression
+            stepped_grid = np.subtract(elevation_grid, min_elev, dtype=elevation_grid.dtype)
+            stepped_grid /= step_height
+            np.round(stepped_grid, out=stepped_grid)
+            stepped_grid *= step_height
+            stepped_grid += min_elev
         
         return stepped_grid
     
-    def _calculate_color_zones(self, elevation_grid: np.ndarray) -> List[Tuple[float, float]]:
-        """Calculate elevation zones for color separation with no gaps."""
-        min_elev = np.min(elevation_grid)
-        max_elev = np.max(elevation_grid)
-        num_colors = self.config.terrain.colors.num_colors
-        
-        if self.config.terrain.colors.color_mode == "elevation":
+    def _calculate_color_zones(self, elevation_grid: np.ndarray,
+                               min_elev: float = None, max_elev: float = None) -> List[Tuple[float, float]]:
+        """Calculate elevation zones for color separation with no gaps.
+
+        Callers that already know the grid extent can pass it in to skip
+        the two full-array reductions.
+        """
+        if min_elev is None:
+            min_elev = np.min(elevation_grid)
+        if max_elev is None:
+            max_elev = np.max(elevation_grid)
+        colors = self.config.terrain.colors
+        num_colors = colors.num_colors
+
+        if colors.color_mode == "elevation":
             zones = []
             
             # First zone: base layer (covers everything - special marker zone)
@@ -117,15 +216,18 @@ class MultiColorMeshGenerator(MeshGenerator):
             
             return zones
         
-        elif self.config.terrain.colors.color_mode == "slope":
+        elif colors.color_mode == "slope":
             # TODO: Implement slope-based coloring
             # For now, fall back to elevation
-            return self._calculate_color_zones_elevation_fallback(elevation_grid)
-    
-    def _calculate_color_zones_elevation_fallback(self, elevation_grid: np.ndarray) -> List[Tuple[float, float]]:
+            return self._calculate_color_zones_elevation_fallback(elevation_grid, min_elev, max_elev)
+
+    def _calculate_color_zones_elevation_fallback(self, elevation_grid: np.ndarray,
+                                                  min_elev: float = None, max_elev: float = None) -> List[Tuple[float, float]]:
         """Fallback elevation-based zones."""
-        min_elev = np.min(elevation_grid)
-        max_elev = np.max(elevation_grid)
+        if min_elev is None:
+            min_elev = np.min(elevation_grid)
+        if max_elev is None:
+            max_elev = np.max(elevation_grid)
         num_colors = self.config.terrain.colors.num_colors
         
         zone_height = (max_elev - min_elev) / num_colors
@@ -152,29 +254,26 @@ class MultiColorMeshGenerator(MeshGenerator):
         
         return names
     
-    def _generate_zone_mesh(self, x_grid: np.ndarray, y_grid: np.ndarray, z_grid: np.ndarray, 
-                           zone_mask: np.ndarray, zone_base_height: float) -> trimesh.Trimesh:
+    def _generate_zone_mesh(self, x_grid: np.ndarray, y_grid: np.ndarray, z_grid: np.ndarray,
+                           zone_idx_grid: np.ndarray, all_zones: List[Tuple[float, float]],
+                           zone_idx: int) -> trimesh.Trimesh:
         """Generate mesh - base is full terrain, color layers are thin tops."""
-        
+
         # Color layer thickness (configurable)
         color_layer_thickness = self.config.terrain.colors.layer_thickness_mm
-        
-        # Check if this is the base mesh (first/lowest zone)
-        all_zones = self._calculate_color_zones(z_grid)
+
+        # The base mesh is the first/lowest zone
         if len(all_zones) == 0:
             return None
-            
-        min_zone_base = all_zones[0][0]
-        is_base_mesh = abs(zone_base_height - min_zone_base) < 0.001
-        
-        if is_base_mesh:
+
+        if zone_idx == 0:
             # BASE LAYER: Goes from floor (0) up to original terrain height
             
-            # Base fills from floor up to original terrain height
-            base_height_grid = z_grid.copy()
-            
-            # Ensure minimum height is base thickness
-            base_height_grid = np.maximum(base_height_grid, self.config.terrain.base_thickness_mm)
+            # Base fills from floor up to original terrain height, with a
+            # minimum of base thickness; one fused copy+clamp pass instead
+            # of a copy followed by a second maximum allocation
+            base_height_grid = np.empty_like(z_grid)
+            np.maximum(z_grid, self.config.terrain.base_thickness_mm, out=base_height_grid)
             
             # Generate base mesh (covers ENTIRE terrain area up to original terrain height)
             vertices, faces = self._create_surface_mesh(x_grid, y_grid, base_height_grid)
@@ -184,25 +283,11 @@ class MultiColorMeshGenerator(MeshGenerator):
             # Each color layer covers specific elevation zones across ENTIRE XY grid
             
             # Determine which areas of the XY grid belong to this color zone
-            color_areas_mask = self._get_all_areas_for_color(z_grid, all_zones, zone_base_height)
-            
+            color_areas_mask = self._get_all_areas_for_color(zone_idx_grid, zone_idx)
+
             if not np.any(color_areas_mask):
                 return None
-            
-            # Color layers are thin layers that stack on top of base layer
-            # Each color layer only covers its assigned elevation zone
-            # Calculate which elevation zones this layer should occupy
-            
-            # Find which zone index we're working on
-            target_zone_idx = None
-            for idx, (zone_min, zone_max) in enumerate(all_zones):
-                if abs(zone_min - zone_base_height) < 0.001:
-                    target_zone_idx = idx
-                    break
-            
-            if target_zone_idx is None or target_zone_idx == 0:
-                return None  # Skip base zone or invalid zone
-                
+
             # Color layers stack on top of base layer (which ends at z_grid height)
             # Each color layer is a thin layer_thickness above the base
             # Layer 1: from base_top to base_top + layer_thickness
@@ -211,170 +296,101 @@ class MultiColorMeshGenerator(MeshGenerator):
             # Color layers sit directly on top of base at terrain height
             # They are thin layers above the terrain surface
             
-            layer_bottom = z_grid.copy()  # Start at terrain surface (where base ends)
-            layer_top = z_grid + color_layer_thickness  # Add thickness above terrain
-            
-            zone_z_bottom = layer_bottom.copy()
-            zone_z_top = layer_top.copy()
-            
-            # Only include areas assigned to this color zone
-            zone_z_top[~color_areas_mask] = np.nan
-            zone_z_bottom[~color_areas_mask] = np.nan
-            
+            # The boolean color_areas_mask is the single source of truth
+            # for which cells belong to this layer - no NaN sentinels
+            zone_z_bottom = z_grid  # Start at terrain surface (where base ends)
+            zone_z_top = z_grid + color_layer_thickness  # Add thickness above terrain
+
             # Generate raised color layer mesh
-            vertices, faces = self._create_color_layer_mesh(x_grid, y_grid, zone_z_top, zone_z_bottom, color_areas_mask, zone_base_height, z_grid)
+            vertices, faces = self._create_color_layer_mesh(x_grid, y_grid, zone_z_top, zone_z_bottom, color_areas_mask, zone_idx_grid, zone_idx, z_grid)
         
         if len(vertices) == 0:
             return None
         
-        # Create mesh
-        mesh = trimesh.Trimesh(vertices=vertices, faces=faces)
-        mesh = self._validate_and_fix_mesh(mesh)
+        # Create mesh; vertices are already indexed and unique by
+        # construction, so skip trimesh's merge pass on construction.
+        # The base layer is the same grid surface + base construction
+        # generate_mesh trusts; color layers have cut boundaries and are
+        # not watertight by construction, so they keep full validation
+        mesh = trimesh.Trimesh(vertices=vertices, faces=faces, process=False)
+        mesh = self._validate_and_fix_mesh(mesh, trusted=(zone_idx == 0))
         
         return mesh
     
-    def _scan_visible_areas_for_color(self, z_grid: np.ndarray, all_zones: List[Tuple[float, float]], 
-                                    target_zone_base: float) -> np.ndarray:
+    def _assign_zones_grid(self, z_grid: np.ndarray, all_zones: List[Tuple[float, float]]) -> np.ndarray:
+        """Classify every grid point into its color zone in one vectorized pass.
+
+        The boundaries between consecutive color zones are the upper edges
+        of each zone (overlap goes to the lower zone, matching the scalar
+        first-match behavior), so a binary search replaces the per-pixel
+        Python zone walk.
+        """
+        upper_edges = np.array([zone_max for _, zone_max in all_zones[1:-1]])
+        zone_idx = np.searchsorted(upper_edges, z_grid.ravel(), side='left') + 1
+        return zone_idx.reshape(z_grid.shape)
+
+    def _scan_visible_areas_for_color(self, z_grid: np.ndarray, all_zones: List[Tuple[float, float]],
+                                    target_zone_idx: int) -> np.ndarray:
         """Scan grid top-down to find areas where this color would be visible from above."""
-        
-        visible_mask = np.zeros_like(z_grid, dtype=bool)
-        
-        # Find which zone index we're looking for
-        target_zone_idx = None
-        for idx, (zone_min, zone_max) in enumerate(all_zones):
-            if abs(zone_min - target_zone_base) < 0.001:
-                target_zone_idx = idx
-                break
-        
-        if target_zone_idx is None:
-            return visible_mask
-        
-        # For each X,Y point, determine which color zone is at the top surface
-        for i in range(z_grid.shape[0]):
-            for j in range(z_grid.shape[1]):
-                elevation = z_grid[i, j]
-                
-                # Find which zone this elevation belongs to - MUST assign to a zone
-                point_zone_idx = self._assign_elevation_to_zone(elevation, all_zones)
-                
-                # This color is visible if it's the assigned zone at this point
-                if point_zone_idx == target_zone_idx:
-                    visible_mask[i, j] = True
-        
-        return visible_mask
-    
-    def _get_all_areas_for_color(self, z_grid: np.ndarray, all_zones: List[Tuple[float, float]], 
-                                target_zone_base: float) -> np.ndarray:
+
+        # This color is visible wherever it's the assigned surface zone
+        return self._assign_zones_grid(z_grid, all_zones) == target_zone_idx
+
+    def _get_all_areas_for_color(self, zone_idx_grid: np.ndarray,
+                                target_zone_idx: int) -> np.ndarray:
         """Get areas for this color including shared boundary points with adjacent layers."""
-        
-        color_mask = np.zeros_like(z_grid, dtype=bool)
-        
-        # Find which zone index we're looking for
-        target_zone_idx = None
-        for idx, (zone_min, zone_max) in enumerate(all_zones):
-            if abs(zone_min - target_zone_base) < 0.001:
-                target_zone_idx = idx
-                break
-        
-        if target_zone_idx is None:
-            return color_mask
-        
+
         if target_zone_idx == 0:
-            # Base zone covers everything 
-            color_mask[:, :] = True
+            # Base zone covers everything
+            color_mask = np.ones(zone_idx_grid.shape, dtype=bool)
         else:
-            # For color zones, include points that belong to this zone
-            # PLUS boundary points from the next layer up to fill gaps
-            for i in range(z_grid.shape[0]):
-                for j in range(z_grid.shape[1]):
-                    elevation = z_grid[i, j]
-                    if not np.isnan(elevation):
-                        point_zone = self._assign_elevation_to_zone(elevation, all_zones)
-                        
-                        # Include points that belong to this zone
-                        if point_zone == target_zone_idx:
-                            color_mask[i, j] = True
-                        # Also include boundary points from higher layers that need to connect
-                        # BUT only if this XY position isn't already covered by this layer or lower layers
-                        elif (point_zone > target_zone_idx and 
-                              self._is_boundary_intersection(i, j, z_grid, all_zones, target_zone_idx) and
-                              not self._is_xy_already_covered(i, j, z_grid, all_zones, target_zone_idx)):
-                            color_mask[i, j] = True
-        
+            # The caller's precomputed classification is reused; the
+            # per-pixel zone walks only remain for the sparse boundary
+            # candidates from higher layers
+
+            # Include points that belong to this zone
+            color_mask = zone_idx_grid == target_zone_idx
+
+            # Also include boundary points from higher layers that need to connect
+            # BUT only if this XY position isn't already covered by this layer or lower layers
+            for i, j in np.argwhere(zone_idx_grid > target_zone_idx):
+                if (self._is_boundary_intersection(i, j, zone_idx_grid, target_zone_idx) and
+                        not self._is_xy_already_covered(i, j, zone_idx_grid, target_zone_idx)):
+                    color_mask[i, j] = True
+
         return color_mask
-    
-    def _is_boundary_intersection(self, i: int, j: int, z_grid: np.ndarray, 
-                                all_zones: List[Tuple[float, float]], target_zone_idx: int) -> bool:
+
+    def _is_boundary_intersection(self, i: int, j: int, zone_idx_grid: np.ndarray,
+                                target_zone_idx: int) -> bool:
         """Check if a point from a higher layer should be included to fill boundary gaps."""
-        
-        # Check neighboring points to see if any belong to the current layer OR lower layers
-        # If so, this point from a higher layer should be included to connect
-        neighbors = []
-        for di in [-1, 0, 1]:
-            for dj in [-1, 0, 1]:
-                if di == 0 and dj == 0:
-                    continue  # Skip center point
-                ni, nj = i + di, j + dj
-                if 0 <= ni < z_grid.shape[0] and 0 <= nj < z_grid.shape[1]:
-                    neighbors.append((ni, nj))
-        
+
         # Check if any neighbor belongs to the target zone or any lower zone
-        # This creates a "stacking" effect where higher layers connect down to fill gaps
-        for ni, nj in neighbors:
-            neighbor_elevation = z_grid[ni, nj]
-            if not np.isnan(neighbor_elevation):
-                neighbor_zone = self._assign_elevation_to_zone(neighbor_elevation, all_zones)
-                if neighbor_zone <= target_zone_idx:
-                    return True  # Include this boundary point to connect to lower layers
-        
-        return False
-    
-    def _is_xy_already_covered(self, i: int, j: int, z_grid: np.ndarray, 
-                             all_zones: List[Tuple[float, float]], target_zone_idx: int) -> bool:
+        # This creates a "stacking" effect where higher layers connect down
+        # to fill gaps. The center pixel is in a higher zone, so including
+        # it in the window can't produce a false positive.
+        window = zone_idx_grid[max(i - 1, 0):i + 2, max(j - 1, 0):j + 2]
+        return bool(np.any(window <= target_zone_idx))
+
+    def _is_xy_already_covered(self, i: int, j: int, zone_idx_grid: np.ndarray,
+                             target_zone_idx: int) -> bool:
         """Check if this XY position is already covered by the current layer or lower layers."""
-        
-        # Check if any neighbor belongs to the current layer or lower layers
-        # If so, this XY position is already covered and we shouldn't add overlap
-        neighbors = []
-        for di in [-1, 0, 1]:
-            for dj in [-1, 0, 1]:
-                if di == 0 and dj == 0:
-                    continue  # Skip center point
-                ni, nj = i + di, j + dj
-                if 0 <= ni < z_grid.shape[0] and 0 <= nj < z_grid.shape[1]:
-                    neighbors.append((ni, nj))
-        
-        # Check if enough neighbors belong to current/lower layers to consider this covered
-        covered_neighbors = 0
-        total_neighbors = 0
-        
-        for ni, nj in neighbors:
-            neighbor_elevation = z_grid[ni, nj]
-            if not np.isnan(neighbor_elevation):
-                total_neighbors += 1
-                neighbor_zone = self._assign_elevation_to_zone(neighbor_elevation, all_zones)
-                if neighbor_zone <= target_zone_idx:
-                    covered_neighbors += 1
-        
+
+        # Check if enough neighbors belong to current/lower layers to
+        # consider this covered; the center pixel is in a higher zone, so
+        # subtract it from the neighbor total only
+        window = zone_idx_grid[max(i - 1, 0):i + 2, max(j - 1, 0):j + 2]
+
+        total_neighbors = window.size - 1
+        covered_neighbors = int(np.count_nonzero(window <= target_zone_idx))
+
         # If most neighbors are already covered, consider this XY position covered
-        if total_neighbors > 0 and covered_neighbors >= total_neighbors * 0.6:  # 60% threshold
-            return True
-        
-        return False
+        return total_neighbors > 0 and covered_neighbors >= total_neighbors * 0.6  # 60% threshold
     
     def _is_boundary_point(self, i: int, j: int, z_grid: np.ndarray, 
                           all_zones: List[Tuple[float, float]], target_zone_idx: int) -> bool:
         """Disable boundary point logic - just use simple zone assignment."""
         return False
     
-    def _get_zone_index_for_base(self, target_zone_base: float, elevation_grid: np.ndarray) -> int:
-        """Get the zone index for the given zone base height."""
-        all_zones = self._calculate_color_zones(elevation_grid)
-        for idx, (zone_min, zone_max) in enumerate(all_zones):
-            if abs(zone_min - target_zone_base) < 0.001:
-                return idx
-        return 0
-    
     def _assign_elevation_to_zone(self, elevation: float, all_zones: List[Tuple[float, float]]) -> int:
         """Assign elevation to a zone, ensuring NO data is left out."""
         
@@ -408,210 +424,132 @@ class MultiColorMeshGenerator(MeshGenerator):
         """Create a printable layer mesh that sits on the previous layer."""
         
         # Create surface mesh for the entire area, but with zone areas elevated
-        vertices, faces = self._create_surface_mesh(x_grid, y_grid, z_grid)
-        
-        # Convert to lists for easier manipulation
-        vertices = vertices.tolist() if isinstance(vertices, np.ndarray) else vertices
-        faces = faces.tolist() if isinstance(faces, np.ndarray) else faces
-        
-        # Add a flat bottom at zone_bottom height for the interface layer
-        original_vertex_count = len(vertices)
-        
-        # Create bottom vertices at the interface height
-        for i in range(original_vertex_count):
-            x, y, _ = vertices[i]
-            vertices.append([x, y, zone_bottom])
-        
-        # Add side walls connecting top to bottom where needed
-        # This creates a solid printable piece
+        surface_vertices, surface_faces = self._create_surface_mesh(x_grid, y_grid, z_grid)
+        num_surface = len(surface_vertices)
         rows, cols = x_grid.shape
-        
-        # Add bottom triangles (full area at zone_bottom height)
-        for i in range(rows - 1):
-            for j in range(cols - 1):
-                # Calculate vertex indices for the bottom face
-                v00_bottom = original_vertex_count + (i * cols + j)
-                v01_bottom = original_vertex_count + (i * cols + (j + 1))
-                v10_bottom = original_vertex_count + ((i + 1) * cols + j)
-                v11_bottom = original_vertex_count + ((i + 1) * cols + (j + 1))
-                
-                # Add bottom triangles (reverse winding for bottom face)
-                faces.extend([
-                    [v00_bottom, v10_bottom, v01_bottom],
-                    [v01_bottom, v10_bottom, v11_bottom]
-                ])
-        
-        # Add side walls around the perimeter
-        # Connect the top surface to the bottom surface around edges
-        boundary_indices = self._get_ordered_boundary_indices(rows, cols)
-        
-        for i in range(len(boundary_indices)):
-            curr_idx = boundary_indices[i]
-            next_idx = boundary_indices[(i + 1) % len(boundary_indices)]
-            
-            # Connect top to bottom
-            top_curr = curr_idx
-            top_next = next_idx
-            bottom_curr = original_vertex_count + curr_idx
-            bottom_next = original_vertex_count + next_idx
-            
-            # Add side wall triangles
-            faces.extend([
-                [bottom_curr, top_curr, bottom_next],
-                [top_curr, top_next, bottom_next]
-            ])
-        
-        return np.array(vertices), np.array(faces)
+
+        # One preallocated buffer: surface on top, the same footprint
+        # flattened to the interface height underneath
+        vertices = np.empty((2 * num_surface, 3), dtype=surface_vertices.dtype)
+        vertices[:num_surface] = surface_vertices
+        vertices[num_surface:, :2] = surface_vertices[:, :2]
+        vertices[num_surface:, 2] = zone_bottom
+
+        # Side wall quads between each boundary vertex and its successor,
+        # two triangles each, built from index arithmetic on the perimeter
+        boundary = self._get_ordered_boundary_indices(rows, cols)
+        succ = np.roll(boundary, -1)
+        side_faces = np.empty((2 * boundary.size, 3), dtype=np.int64)
+        side_faces[0::2] = np.stack([boundary + num_surface, boundary, succ + num_surface], axis=1)
+        side_faces[1::2] = np.stack([boundary, succ, succ + num_surface], axis=1)
+
+        # Assemble into one face array: surface, walls, then the bottom
+        # at zone_bottom with reversed winding so it points down
+        num_faces = len(surface_faces)
+        num_side = len(side_faces)
+        faces = np.empty((2 * num_faces + num_side, 3), dtype=surface_faces.dtype)
+        faces[:num_faces] = surface_faces
+        faces[num_faces:num_faces + num_side] = side_faces
+        faces[num_faces + num_side:] = surface_faces[:, [0, 2, 1]] + num_surface
+
+        return vertices, faces
     
-    def _create_color_layer_mesh(self, x_grid: np.ndarray, y_grid: np.ndarray, 
-                                z_top_grid: np.ndarray, z_bottom_grid: np.ndarray, 
-                                zone_mask: np.ndarray, target_zone_base: float, 
+    def _create_color_layer_mesh(self, x_grid: np.ndarray, y_grid: np.ndarray,
+                                z_top_grid: np.ndarray, z_bottom_grid: np.ndarray,
+                                zone_mask: np.ndarray, zone_idx_grid: np.ndarray,
+                                target_zone_idx: int,
                                 z_grid: np.ndarray = None) -> Tuple[np.ndarray, np.ndarray]:
         """Create mesh only for areas that belong to this specific color zone."""
-        
+
         rows, cols = x_grid.shape
-        vertices = []
-        faces = []
-        
-        # Create vertices only for points that belong to this zone
+
+        # The zone mask alone decides vertex membership
+        valid = zone_mask
+        num_points = int(np.count_nonzero(valid))
+        if num_points == 0:
+            return np.array([]).reshape(0, 3), np.array([]).reshape(0, 3)
+
+        # Points in this zone keep the layer heights; boundary intersection
+        # points from the next layer up are adjusted to current-layer height
+        elevation = z_grid if z_grid is not None else z_bottom_grid
+        belongs = zone_idx_grid == target_zone_idx
+        layer_thickness = self.config.terrain.colors.layer_thickness_mm
+        z_top_sel = np.where(belongs, z_top_grid, elevation + layer_thickness)
+        z_bottom_sel = np.where(belongs, z_bottom_grid, elevation)
+
+        # Interleaved top/bottom vertices per valid point, in row-major
+        # order, with flat index maps for face construction
         vertex_indices_top = np.full((rows, cols), -1, dtype=int)
         vertex_indices_bottom = np.full((rows, cols), -1, dtype=int)
-        
-        # Add vertices for zones that belong to this layer (including boundary intersections)
-        all_zones = self._calculate_color_zones(z_grid)
-        
-        # Find target zone index
-        target_zone_idx = None
-        for idx, (zone_min, zone_max) in enumerate(all_zones):
-            if abs(zone_min - target_zone_base) < 0.001:
-                target_zone_idx = idx
-                break
-        
-        for i in range(rows):
-            for j in range(cols):
-                if zone_mask[i, j] and not np.isnan(z_bottom_grid[i, j]):
-                    x, y = x_grid[i, j], y_grid[i, j]
-                    
-                    # Check if this point belongs to the current zone or is a boundary intersection
-                    elevation = z_grid[i, j] if z_grid is not None else z_bottom_grid[i, j]
-                    point_zone = self._assign_elevation_to_zone(elevation, all_zones)
-                    
-                    if point_zone == target_zone_idx:
-                        # Point belongs to this layer - use layer height
-                        z_top = z_top_grid[i, j]
-                        z_bottom = z_bottom_grid[i, j]
-                    else:
-                        # Boundary intersection point from next layer up - adjust height to current layer
-                        layer_thickness = self.config.terrain.colors.layer_thickness_mm
-                        z_bottom = elevation  # Use terrain elevation as bottom
-                        z_top = elevation + layer_thickness  # Add layer thickness
-                    
-                    # Add top and bottom vertices
-                    vertex_indices_top[i, j] = len(vertices)
-                    vertices.append([x, y, z_top])
-                    
-                    vertex_indices_bottom[i, j] = len(vertices)
-                    vertices.append([x, y, z_bottom])
-        
-        # Create faces only for cells that have actual height variation
-        for i in range(rows - 1):
-            for j in range(cols - 1):
-                # Check if all 4 corners have valid vertices
-                if (vertex_indices_top[i, j] >= 0 and vertex_indices_top[i, j+1] >= 0 and
-                    vertex_indices_top[i+1, j] >= 0 and vertex_indices_top[i+1, j+1] >= 0):
-                    
-                    
-                    # Get vertex indices for this quad
-                    v00_top = vertex_indices_top[i, j]
-                    v01_top = vertex_indices_top[i, j+1]
-                    v10_top = vertex_indices_top[i+1, j]
-                    v11_top = vertex_indices_top[i+1, j+1]
-                    
-                    v00_bottom = vertex_indices_bottom[i, j]
-                    v01_bottom = vertex_indices_bottom[i, j+1]
-                    v10_bottom = vertex_indices_bottom[i+1, j]
-                    v11_bottom = vertex_indices_bottom[i+1, j+1]
-                    
-                    # Top surface (2 triangles)
-                    faces.append([v00_top, v01_top, v10_top])
-                    faces.append([v01_top, v11_top, v10_top])
-                    
-                    # Bottom surface (2 triangles, reverse winding)
-                    faces.append([v00_bottom, v10_bottom, v01_bottom])
-                    faces.append([v01_bottom, v10_bottom, v11_bottom])
-                    
-                    # Side walls (4 walls, each with 2 triangles)
-                    walls = [(v00_top, v00_bottom, v01_top, v01_bottom),  # Wall 1
-                            (v01_top, v01_bottom, v11_top, v11_bottom),   # Wall 2  
-                            (v11_top, v11_bottom, v10_top, v10_bottom),   # Wall 3
-                            (v10_top, v10_bottom, v00_top, v00_bottom)]   # Wall 4
-                    
-                    for vt1, vb1, vt2, vb2 in walls:
-                        faces.append([vb1, vt1, vb2])
-                        faces.append([vt1, vt2, vb2])
-        
-        return np.array(vertices) if vertices else np.array([]).reshape(0, 3), \
-               np.array(faces) if faces else np.array([]).reshape(0, 3)
+        vertex_indices_top[valid] = 2 * np.arange(num_points)
+        vertex_indices_bottom[valid] = 2 * np.arange(num_points) + 1
+
+        vertices = np.empty((2 * num_points, 3), dtype=x_grid.dtype)
+        vertices[0::2, 0] = x_grid[valid]
+        vertices[0::2, 1] = y_grid[valid]
+        vertices[0::2, 2] = z_top_sel[valid]
+        vertices[1::2, :2] = vertices[0::2, :2]
+        vertices[1::2, 2] = z_bottom_sel[valid]
+
+        # Quads where all 4 corners have valid vertices
+        quad_valid = valid[:-1, :-1] & valid[:-1, 1:] & valid[1:, :-1] & valid[1:, 1:]
+        if not quad_valid.any():
+            return vertices, np.array([]).reshape(0, 3)
+
+        # All 12 triangles per quad in one gather: stack the 8 corner ids
+        # per quad and index them with the shared face template
+        corner_ids = np.stack([
+            vertex_indices_top[:-1, :-1][quad_valid],
+            vertex_indices_top[:-1, 1:][quad_valid],
+            vertex_indices_top[1:, :-1][quad_valid],
+            vertex_indices_top[1:, 1:][quad_valid],
+        ], axis=1)
+        corner_ids = np.concatenate([corner_ids, corner_ids + 1], axis=1)
+
+        faces = corner_ids[:, _QUAD_FACE_TEMPLATE].reshape(-1, 3)
+
+        return vertices, faces
     
     def validate_layer_intersections(self, meshes: Dict[str, trimesh.Trimesh]) -> bool:
         """Check if any two layers intersect in the same mesh space."""
         
         layer_names = list(meshes.keys())
         intersections_found = False
-        
+
         print("🔍 Validating layer intersections...")
-        
-        for i in range(len(layer_names)):
-            for j in range(i + 1, len(layer_names)):
+
+        if len(layer_names) >= 2:
+            # All pairwise bounding-box overlaps at once: stack bounds into
+            # (L, 2, 3) and broadcast min(maxes) - max(mins) per axis
+            bounds = np.stack([meshes[name].bounds for name in layer_names])
+            overlap = (np.minimum(bounds[:, None, 1], bounds[None, :, 1]) -
+                       np.maximum(bounds[:, None, 0], bounds[None, :, 0]))
+            touching = (overlap >= 0).all(axis=-1)
+            volumes = np.maximum(overlap, 0).prod(axis=-1)
+
+            for i, j in zip(*np.triu_indices(len(layer_names), k=1)):
+                if not touching[i, j]:
+                    continue
+
                 layer1_name = layer_names[i]
                 layer2_name = layer_names[j]
-                mesh1 = meshes[layer1_name]
-                mesh2 = meshes[layer2_name]
-                
-                # Check if bounding boxes overlap
-                bbox1 = mesh1.bounds
-                bbox2 = mesh2.bounds
-                
-                # Check for overlap in all three dimensions
-                x_overlap = bbox1[0][0] <= bbox2[1][0] and bbox2[0][0] <= bbox1[1][0]
-                y_overlap = bbox1[0][1] <= bbox2[1][1] and bbox2[0][1] <= bbox1[1][1]
-                z_overlap = bbox1[0][2] <= bbox2[1][2] and bbox2[0][2] <= bbox1[1][2]
-                
-                if x_overlap and y_overlap and z_overlap:
-                    # Bounding boxes overlap, check for detailed intersection
-                    overlap_volume = self._calculate_overlap_volume(bbox1, bbox2)
-                    
-                    print(f"⚠️  Potential intersection between {layer1_name} and {layer2_name}")
-                    print(f"   {layer1_name} bounds: {bbox1}")
-                    print(f"   {layer2_name} bounds: {bbox2}")
-                    print(f"   Overlap volume: {overlap_volume:.3f} mm³")
-                    
-                    # Check if z-ranges overlap (most critical for layer stacking)
-                    z1_min, z1_max = bbox1[0][2], bbox1[1][2]
-                    z2_min, z2_max = bbox2[0][2], bbox2[1][2]
-                    
-                    if z1_min < z2_max and z2_min < z1_max:
-                        z_overlap_amount = min(z1_max, z2_max) - max(z1_min, z2_min)
-                        print(f"   ❌ Z-axis overlap: {z_overlap_amount:.3f} mm")
-                        intersections_found = True
-                    else:
-                        print(f"   ✅ No Z-axis overlap")
-        
+                print(f"⚠️  Potential intersection between {layer1_name} and {layer2_name}")
+                print(f"   {layer1_name} bounds: {bounds[i]}")
+                print(f"   {layer2_name} bounds: {bounds[j]}")
+                print(f"   Overlap volume: {volumes[i, j]:.3f} mm³")
+
+                # Check if z-ranges overlap (most critical for layer stacking)
+                if overlap[i, j, 2] > 0:
+                    print(f"   ❌ Z-axis overlap: {overlap[i, j, 2]:.3f} mm")
+                    intersections_found = True
+                else:
+                    print(f"   ✅ No Z-axis overlap")
+
         if not intersections_found:
             print("✅ No layer intersections detected!")
         
         return not intersections_found
     
-    def _calculate_overlap_volume(self, bbox1, bbox2):
-        """Calculate the volume of overlap between two bounding boxes."""
-        
-        # Calculate overlap in each dimension
-        x_overlap = max(0, min(bbox1[1][0], bbox2[1][0]) - max(bbox1[0][0], bbox2[0][0]))
-        y_overlap = max(0, min(bbox1[1][1], bbox2[1][1]) - max(bbox1[0][1], bbox2[0][1]))
-        z_overlap = max(0, min(bbox1[1][2], bbox2[1][2]) - max(bbox1[0][2], bbox2[0][2]))
-        
-        return x_overlap * y_overlap * z_overlap
-    
     def _create_full_quad_faces(self, corners, vertex_indices_top, vertex_indices_bottom, faces):
         """Create faces for a complete quad."""
         # Sort corners to get correct order
@@ -707,109 +645,118 @@ class MultiColorMeshGenerator(MeshGenerator):
             faces.append([vb1, vt1, vb2])
             faces.append([vt1, vt2, vb2])
     
+    @staticmethod
+    def _side_wall_faces(top_vertices, bottom_vertices) -> np.ndarray:
+        """All side-wall triangles around a polygon in one stacked block.
+
+        Each edge gets two triangles connecting the top ring to the
+        bottom ring, with the same winding the per-edge loop produced.
+        """
+        top = np.asarray(top_vertices, dtype=np.int64)
+        bottom = np.asarray(bottom_vertices, dtype=np.int64)
+        top_next = np.roll(top, -1)
+        bottom_next = np.roll(bottom, -1)
+
+        walls = np.empty((2 * top.size, 3), dtype=np.int64)
+        walls[0::2] = np.stack([bottom, top, bottom_next], axis=1)
+        walls[1::2] = np.stack([top, top_next, bottom_next], axis=1)
+        return walls
+
     def _add_thin_layer_section(self, corner_coords, vertices, faces, add_vertex):
         """Add a thin layer section between top and bottom surfaces."""
         
         if len(corner_coords) < 3:
             return
-        
-        # For a proper quad (4 corners), create a rectangular thin layer
-        if len(corner_coords) == 4:
-            # Sort corners to create proper quad topology
-            x_coords = [coord[0] for coord in corner_coords]
-            y_coords = [coord[1] for coord in corner_coords]
-            
-            # Create vertices for quad corners in order
-            top_vertices = []
-            bottom_vertices = []
-            
-            for x, y, z_top, z_bottom in corner_coords:
-                top_vertices.append(add_vertex(x, y, z_top))
-                bottom_vertices.append(add_vertex(x, y, z_bottom))
-            
-            # Create top surface - two triangles for the quad
-            faces.append([top_vertices[0], top_vertices[1], top_vertices[2]])
-            faces.append([top_vertices[0], top_vertices[2], top_vertices[3]])
-            
-            # Create bottom surface - two triangles (reverse winding)
-            faces.append([bottom_vertices[0], bottom_vertices[2], bottom_vertices[1]])
-            faces.append([bottom_vertices[0], bottom_vertices[3], bottom_vertices[2]])
-            
-            # Create side walls - 4 rectangular sides, each made of 2 triangles
-            for i in range(4):
-                next_i = (i + 1) % 4
-                v1_top = top_vertices[i]
-                v1_bottom = bottom_vertices[i]
-                v2_top = top_vertices[next_i]
-                v2_bottom = bottom_vertices[next_i]
-                
-                # Two triangles for each side wall
-                faces.append([v1_bottom, v1_top, v2_bottom])
-                faces.append([v1_top, v2_top, v2_bottom])
-        
-        else:
-            # For triangular or other shapes, use fan triangulation
-            top_vertices = []
-            bottom_vertices = []
-            
-            for x, y, z_top, z_bottom in corner_coords:
-                top_vertices.append(add_vertex(x, y, z_top))
-                bottom_vertices.append(add_vertex(x, y, z_bottom))
-            
-            # Create top surface triangles using fan triangulation
-            for i in range(1, len(top_vertices) - 1):
-                faces.append([top_vertices[0], top_vertices[i], top_vertices[i+1]])
-            
-            # Create bottom surface triangles (reverse winding)
-            for i in range(1, len(bottom_vertices) - 1):
-                faces.append([bottom_vertices[0], bottom_vertices[i+1], bottom_vertices[i]])
-            
-            # Create side walls
-            for i in range(len(top_vertices)):
-                next_i = (i + 1) % len(top_vertices)
-                
-                v1_top = top_vertices[i]
-                v1_bottom = bottom_vertices[i]
-                v2_top = top_vertices[next_i]
-                v2_bottom = bottom_vertices[next_i]
-                
-                # Two triangles for the side face
-                faces.append([v1_bottom, v1_top, v2_bottom])
-                faces.append([v1_top, v2_top, v2_bottom])
+
+        top_vertices = []
+        bottom_vertices = []
+
+        for x, y, z_top, z_bottom in corner_coords:
+            top_vertices.append(add_vertex(x, y, z_top))
+            bottom_vertices.append(add_vertex(x, y, z_bottom))
+
+        top = np.asarray(top_vertices, dtype=np.int64)
+        bottom = np.asarray(bottom_vertices, dtype=np.int64)
+
+        # Fan-triangulate top and bottom from the first corner with
+        # arange-built index blocks; for a quad this yields exactly the
+        # [0,1,2]/[0,2,3] split the dedicated branch used to emit
+        k = np.arange(1, top.size - 1)
+        fan = np.stack([np.zeros_like(k), k, k + 1], axis=1)
+
+        # One preallocated block for the whole section: top fan, bottom
+        # fan (winding flipped by a reversed view of the same template),
+        # then the side walls - a single extend instead of per-surface
+        # list growth
+        n_fan = k.size
+        section = np.empty((2 * n_fan + 2 * top.size, 3), dtype=np.int64)
+        section[:n_fan] = top[fan]
+        section[n_fan:2 * n_fan] = bottom[fan[:, ::-1]]
+        section[2 * n_fan:] = self._side_wall_faces(top, bottom)
+
+        faces.extend(section.tolist())
     
-    def save_multi_color_stls(self, meshes: Dict[str, trimesh.Trimesh], base_filename: str) -> List[str]:
-        """Save multiple STL files for multi-color printing in a dedicated output folder."""
-        import os
-        
-        filenames = []
-        
+    def save_multi_color_stls(self, meshes: Dict[str, trimesh.Trimesh], base_filename: str,
+                              bundle: bool = False) -> List[str]:
+        """Save multiple STL files for multi-color printing in a dedicated output folder.
+
+        With ``bundle=True`` all layers go into one uncompressed zip
+        instead of individual files, trading per-file metadata overhead
+        for a single archive write.
+        """
         if not meshes:
-            return filenames
-        
-        # Create output directory based on base filename
-        base_path = os.path.dirname(base_filename) if os.path.dirname(base_filename) else "."
+            return []
+
         base_name = os.path.basename(base_filename)
         name_without_ext = os.path.splitext(base_name)[0]
-        
-        # Create output folder
-        output_dir = os.path.join(base_path, f"{name_without_ext}_output")
-        os.makedirs(output_dir, exist_ok=True)
-        
-        mesh_keys = list(meshes.keys())
-        
-        for color_name, mesh in meshes.items():
-            if len(meshes) == 1:
+
+        # Create the output directory based on the base filename; cached
+        # per base filename so repeated saves skip the stat/mkdir pair
+        output_dir = self._output_dir_cache.get(base_filename)
+        if output_dir is None:
+            base_path = os.path.dirname(base_filename) or "."
+            output_dir = os.path.join(base_path, f"{name_without_ext}_output")
+            os.makedirs(output_dir, exist_ok=True)
+            self._output_dir_cache[base_filename] = output_dir
+
+        # Filename pieces are per-run constants, so split them once here
+        multi = len(meshes) > 1
+        name_parts = base_name.rsplit('.', 1)
+        stem, ext = name_parts if len(name_parts) == 2 else (base_name, None)
+
+        if bundle:
+            # One stored (uncompressed) archive: binary STL doesn't
+            # compress meaningfully, so this is pure I/O batching
+            bundle_path = os.path.join(output_dir, f"{name_without_ext}.zip")
+            with zipfile.ZipFile(bundle_path, 'w', zipfile.ZIP_STORED) as zf:
+                for color_name, mesh in meshes.items():
+                    member = f"{stem}_{color_name}.{ext}" if multi and ext else base_name
+                    zf.writestr(member, export_stl(mesh))
+            return [bundle_path]
+
+        def export_one(color_name: str, mesh: trimesh.Trimesh) -> str:
+            if not multi:
                 # Single color - put in output folder
                 filename = os.path.join(output_dir, base_name)
-            else:
+            elif ext is not None:
                 # Multi-layer - use sequential numbering in output folder
-                name_parts = base_name.rsplit('.', 1)
-                if len(name_parts) == 2:
-                    filename = os.path.join(output_dir, f"{name_parts[0]}_{color_name}.{name_parts[1]}")
-                else:
-                    filename = os.path.join(output_dir, f"{base_name}_{color_name}")
-            
-            mesh.export(filename)
-            filenames.append(filename)
-        
-        return filenames
\ No newline at end of file
+                filename = os.path.join(output_dir, f"{stem}_{color_name}.{ext}")
+            else:
+                filename = os.path.join(output_dir, f"{base_name}_{color_name}")
+
+            if filename.lower().endswith('.stl'):
+                # Write the binary STL records through a memory map,
+                # skipping export's extension dispatch and its full
+                # in-memory byte buffer
+                _write_binary_stl(mesh, filename)
+            else:
+                # Other formats go through the generic exporter, but with
+                # a large-buffered handle so small writes coalesce
+                with open(filename, 'wb', buffering=1 << 20) as f:
+                    mesh.export(f, file_type=os.path.splitext(filename)[1].lstrip('.').lower())
+            return filename
+
+        # The per-layer exports are independent, so overlap serialization
+        # and disk writes on the thread pool; map preserves layer order
+        with ThreadPoolExecutor(max_workers=min(len(meshes), os.cpu_count() or 1)) as executor:
+            return list(executor.map(lambda item: export_one(*item), meshes.items()))
\ No newline at end of file
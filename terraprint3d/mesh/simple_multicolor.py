@@ -1,43 +1,110 @@
+import os
+
 import numpy as np
 import trimesh
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from scipy.ndimage import binary_dilation
 from typing import Dict, List, Tuple
 from terraprint3d.config.parser import Config
 from terraprint3d.mesh.generator import MeshGenerator
 
 
+@dataclass(slots=True)
+class _GridContext:
+    """Read-only per-run grid state shared by every color layer.
+
+    Zone classification and neighbor adjacency depend only on the input
+    grids, so they are computed once here instead of per layer:
+    `zone_grid` holds the zone index of every pixel and
+    `adjacency_masks[k-1]` is True where a pixel 8-neighbors zone k.
+    """
+    x_grid: np.ndarray
+    y_grid: np.ndarray
+    z_grid: np.ndarray
+    zones: List[Tuple[float, float]]
+    zone_grid: np.ndarray
+    valid_mask: np.ndarray
+    adjacency_masks: np.ndarray
+
+
 class SimpleMultiColorMeshGenerator:
-    def __init__(self, config: Config):
+    def __init__(self, config: Config, validate_mesh: bool = False):
         self.config = config
-        self.base_generator = MeshGenerator(config)
+        self.base_generator = MeshGenerator(config, validate_mesh=validate_mesh)
+        # Normalized XY grids per input region; regenerating over the
+        # same area (e.g. sweeping color counts) skips the lat/lon
+        # transform and bed normalization
+        self._coord_cache: Dict[Tuple, Tuple[np.ndarray, np.ndarray, float]] = {}
     
     def generate_multi_color_meshes(self, lat_grid: np.ndarray, lon_grid: np.ndarray, elevation_grid: np.ndarray) -> Dict[str, trimesh.Trimesh]:
         """Generate multi-color terrain meshes using simple grid approach."""
         
-        # Create the base coordinate grid
-        x_grid, y_grid = self.base_generator._latlon_to_meters(lat_grid, lon_grid)
-        z_grid = elevation_grid * self.config.terrain.vertical_exaggeration
-        x_grid_norm, y_grid_norm, z_grid_norm = self.base_generator._normalize_to_printer_bed(x_grid, y_grid, z_grid)
+        # float32 is ample for printer-bed millimeters and halves the
+        # bandwidth through every downstream pass (matches MeshGenerator)
+        lat_grid = np.asarray(lat_grid, dtype=np.float32)
+        lon_grid = np.asarray(lon_grid, dtype=np.float32)
+        elevation_grid = np.asarray(elevation_grid, dtype=np.float32)
+
+        # Create the base coordinate grid. The grids are axis-aligned, so
+        # shape plus corners identifies the region; repeat runs over the
+        # same area reuse the normalized XY grids and only rescale z
+        z_grid = elevation_grid * np.float32(self.config.terrain.vertical_exaggeration)
+        key = (lat_grid.shape, float(lat_grid[0, 0]), float(lat_grid[-1, -1]),
+               float(lon_grid[0, 0]), float(lon_grid[-1, -1]))
+        cached = self._coord_cache.get(key)
+        if cached is not None:
+            x_grid_norm, y_grid_norm, scale_factor = cached
+            np.subtract(z_grid, z_grid.min(), out=z_grid)
+            z_grid *= np.float32(scale_factor)
+            z_grid_norm = z_grid
+        else:
+            x_grid, y_grid = self.base_generator._latlon_to_meters(lat_grid, lon_grid)
+            x_grid_norm, y_grid_norm, z_grid_norm = self.base_generator._normalize_to_printer_bed(x_grid, y_grid, z_grid)
+            self._coord_cache[key] = (x_grid_norm, y_grid_norm, self.base_generator._last_scale_factor)
         
         # Add layer thickness to ALL heights so base has proper thickness
         layer_thickness = self.config.terrain.colors.layer_thickness_mm
         z_grid_norm += layer_thickness
         
-        # Calculate color zones
+        # Calculate color zones and classify the grid once; every layer
+        # reads the same cached context instead of re-scanning the grid
         zones = self._calculate_color_zones(z_grid_norm)
-        
+        ctx = self._build_grid_context(x_grid_norm, y_grid_norm, z_grid_norm, zones)
+
         meshes = {}
-        
+
         # Generate base layer (covers everything)
         base_mesh = self._create_base_layer(x_grid_norm, y_grid_norm, z_grid_norm)
         meshes["layer00"] = base_mesh
-        
-        # Generate color layers (one for each zone)
-        for i, (zone_min, zone_max) in enumerate(zones[1:], 1):  # Skip base zone
-            layer_mesh = self._create_color_layer(x_grid_norm, y_grid_norm, z_grid_norm, zones, i)
-            if layer_mesh is not None:
-                meshes[f"layer{i:02d}"] = layer_mesh
-        
+
+        # Generate color layers (one for each zone, skipping the base
+        # zone). Each layer only reads the shared context and builds its
+        # own mesh, so the zones run concurrently; the mostly-NumPy work
+        # releases the GIL
+        zone_indices = range(1, len(zones))
+        with ThreadPoolExecutor(max_workers=min(len(zones) - 1, os.cpu_count() or 1)) as executor:
+            futures = [executor.submit(self._create_color_layer, ctx, i) for i in zone_indices]
+            for i, future in zip(zone_indices, futures):
+                layer_mesh = future.result()
+                if layer_mesh is not None:
+                    meshes[f"layer{i:02d}"] = layer_mesh
+
         return meshes
+
+    def _build_grid_context(self, x_grid: np.ndarray, y_grid: np.ndarray, z_grid: np.ndarray,
+                            zones: List[Tuple[float, float]]) -> _GridContext:
+        """Precompute zone and adjacency state shared by all color layers."""
+        zone_grid = self._compute_zone_grid(z_grid, zones)
+        valid_mask = ~np.isnan(z_grid)
+        num_colors = len(zones) - 1
+
+        # One stacked dilation answers "is this pixel 8-adjacent to zone k"
+        # for every zone at once
+        zone_masks = (zone_grid[None, :, :] == np.arange(1, num_colors + 1)[:, None, None]) & valid_mask[None, :, :]
+        adjacency_masks = binary_dilation(zone_masks, structure=np.ones((1, 3, 3), dtype=bool))
+
+        return _GridContext(x_grid, y_grid, z_grid, zones, zone_grid, valid_mask, adjacency_masks)
     
     def _calculate_color_zones(self, z_grid: np.ndarray) -> List[Tuple[float, float]]:
         """Calculate elevation zones for colors."""
@@ -67,60 +134,27 @@ class SimpleMultiColorMeshGenerator:
         
         return zones
     
+    def _compute_zone_grid(self, z_grid: np.ndarray, zones: List[Tuple[float, float]]) -> np.ndarray:
+        """Zone index for every grid point in one vectorized pass.
+
+        Matches `_assign_elevation_to_zone` per pixel: shared zone edges
+        are inclusive on the lower zone (first match wins), and heights
+        outside the range clamp to the nearest zone. One C-level binary
+        search over the grid replaces a Python scan per pixel.
+        """
+        # Interior edges between consecutive color zones; right=True keeps
+        # a height exactly on an edge in the lower zone
+        edges = np.array([zone_max for _, zone_max in zones[1:-1]])
+        return (np.digitize(z_grid, edges, right=True) + 1).astype(np.int32)
+
     def _assign_elevation_to_zone(self, elevation: float, zones: List[Tuple[float, float]]) -> int:
         """Assign elevation to a zone index."""
-        # Skip base zone (index 0), only assign to color zones (1+)
-        color_zones = zones[1:]
-        
-        for idx, (zone_min, zone_max) in enumerate(color_zones):
-            if zone_min <= elevation <= zone_max:
-                return idx + 1
-        
-        # Fallback to nearest zone
-        distances = []
-        for idx, (zone_min, zone_max) in enumerate(color_zones):
-            zone_center = (zone_min + zone_max) / 2
-            distances.append(abs(elevation - zone_center))
-        
-        return distances.index(min(distances)) + 1
-    
-    def _is_boundary_point(self, i: int, j: int, x_grid: np.ndarray, y_grid: np.ndarray, 
-                          z_grid: np.ndarray, zones: List[Tuple[float, float]], target_zone: int) -> bool:
-        """Check if a point is adjacent to any point in the target zone."""
-        rows, cols = x_grid.shape
-        current_height = z_grid[i, j]
-        current_zone = self._assign_elevation_to_zone(current_height, zones)
-        
-        target_neighbors = []
-        
-        # Check all 8 neighbors (including diagonals)
-        for di in [-1, 0, 1]:
-            for dj in [-1, 0, 1]:
-                if di == 0 and dj == 0:
-                    continue
-                    
-                ni, nj = i + di, j + dj
-                if 0 <= ni < rows and 0 <= nj < cols and not np.isnan(z_grid[ni, nj]):
-                    neighbor_height = z_grid[ni, nj]
-                    neighbor_zone = self._assign_elevation_to_zone(neighbor_height, zones)
-                    
-                    if neighbor_zone == target_zone:
-                        target_neighbors.append({
-                            'pos': (ni, nj),
-                            'height': neighbor_height,
-                            'zone': neighbor_zone
-                        })
-        
-        is_boundary = len(target_neighbors) > 0
-        
-        # Debug boundary detection for problematic cases
-        if is_boundary and (current_zone - target_zone) > 1:
-            print(f"       🔍 BOUNDARY: Point ({i},{j}) zone_{current_zone} adjacent to zone_{target_zone}")
-            print(f"          Current height: {current_height:.1f}")
-            print(f"          Zone gap: {current_zone - target_zone} zones")
-            print(f"          Adjacent target neighbors: {len(target_neighbors)}")
-        
-        return is_boundary
+        # Scalar twin of _compute_zone_grid: one binary search over the
+        # interior zone edges replaces the linear scan plus the
+        # nearest-center fallback (out-of-range heights land in the first
+        # or last zone either way)
+        edges = [zone_max for _, zone_max in zones[1:-1]]
+        return int(np.digitize(elevation, edges, right=True)) + 1
     
     def _create_height_map_grid(self, x_grid: np.ndarray, y_grid: np.ndarray, z_grid: np.ndarray) -> Dict:
         """Generate height map grid (X, Y, Z)."""
@@ -146,114 +180,106 @@ class SimpleMultiColorMeshGenerator:
         
         all_vertices = []
         all_faces = []
-        layer_info = {}  # Track which vertices belong to which zones
-        
+        point_zone_grid = self._compute_zone_grid(z_grid, zones)
+
+        # (bottom_idx, top_idx) per cell and layer, -1 where the column
+        # does not reach that layer - a flat int32 block instead of
+        # tuple-keyed dicts of per-layer lists
+        layer_info = np.full((rows, cols, len(zones), 2), -1, dtype=np.int32)
+
+        # One NaN scan up front; the loop only visits valid columns
+        valid_mask = ~np.isnan(z_grid)
+
         # Loop through grid like columns on a table
-        for i in range(rows):
-            for j in range(cols):
-                if not np.isnan(z_grid[i, j]):
-                    x, y = x_grid[i, j], y_grid[i, j]
-                    terrain_height = z_grid[i, j]
-                    point_zone = self._assign_elevation_to_zone(terrain_height, zones)
-                    
-                    # Create column from base (0) to terrain height + layer thickness
-                    column_vertices, column_faces, column_layer_info = self._create_single_column(
-                        x, y, terrain_height, layer_thickness, point_zone, len(all_vertices)
-                    )
-                    
-                    all_vertices.extend(column_vertices)
-                    all_faces.extend(column_faces)
-                    
-                    # Store layer info for this column
-                    layer_info[(i, j)] = column_layer_info
-        
+        for i, j in np.argwhere(valid_mask):
+            x, y = x_grid[i, j], y_grid[i, j]
+            terrain_height = z_grid[i, j]
+            point_zone = point_zone_grid[i, j]
+
+            # Create column from base (0) to terrain height + layer thickness
+            column_vertices, column_faces, column_layer_info = self._create_single_column(
+                x, y, terrain_height, layer_thickness, point_zone, len(all_vertices)
+            )
+
+            all_vertices.extend(column_vertices)
+            all_faces.extend(column_faces)
+
+            # Store layer info for this column
+            for layer_idx, pair in column_layer_info.items():
+                layer_info[i, j, layer_idx] = pair
+
         return {
-            'vertices': all_vertices,
-            'faces': all_faces,
+            'vertices': np.asarray(all_vertices, dtype=np.float32),
+            'faces': np.asarray(all_faces, dtype=np.int32),
             'layer_info': layer_info,
             'zones': zones
         }
     
-    def _create_single_column(self, x: float, y: float, terrain_height: float, layer_thickness: float, 
+    def _create_single_column(self, x: float, y: float, terrain_height: float, layer_thickness: float,
                              point_zone: int, vertex_offset: int) -> Tuple[List, List, Dict]:
-        """Create a single column with all its layers."""
-        vertices = []
+        """Create a single column with all its layers.
+
+        Layer heights are an arithmetic progression of the thickness, so
+        the column vertices come from strided assignments instead of a
+        per-layer append loop: bottoms at even slots, tops at odd slots,
+        terrain top last.
+        """
+        num_column = 2 * point_zone + 1
+        column = np.empty((num_column, 3), dtype=np.float32)
+        column[:, 0] = x
+        column[:, 1] = y
+        layer_z = np.arange(point_zone + 1, dtype=np.float32) * layer_thickness
+        column[0:-1:2, 2] = layer_z[:-1]  # Bottom of each layer
+        column[1:-1:2, 2] = layer_z[1:]   # Top of each layer
+        column[-1, 2] = terrain_height + layer_thickness  # Terrain top
+        vertices = column.tolist()
+
+        layer_info = {
+            layer_idx: [vertex_offset + 2 * (layer_idx - 1), vertex_offset + 2 * (layer_idx - 1) + 1]
+            for layer_idx in range(1, point_zone + 1)
+        }
+
         faces = []
-        layer_info = {}
-        
-        # Create vertices for each layer this column belongs to
-        for layer_idx in range(1, point_zone + 1):  # From layer 1 to point's zone
-            # Bottom of layer
-            bottom_z = (layer_idx - 1) * layer_thickness
-            vertices.append([x, y, bottom_z])
-            bottom_vertex_idx = vertex_offset + len(vertices) - 1
-            
-            # Top of layer
-            top_z = layer_idx * layer_thickness
-            vertices.append([x, y, top_z])
-            top_vertex_idx = vertex_offset + len(vertices) - 1
-            
-            # Store layer info
-            if layer_idx not in layer_info:
-                layer_info[layer_idx] = []
-            layer_info[layer_idx].extend([bottom_vertex_idx, top_vertex_idx])
-        
-        # Add terrain top vertex
-        vertices.append([x, y, terrain_height + layer_thickness])
-        terrain_top_idx = vertex_offset + len(vertices) - 1
-        
-        # Create faces for the column (connecting layers)
-        for i in range(0, len(vertices) - 2, 2):
-            bottom_idx = vertex_offset + i
-            top_idx = vertex_offset + i + 1
-            next_bottom_idx = vertex_offset + i + 2
-            next_top_idx = vertex_offset + i + 3
-            
-            # Create quad faces between layers
-            faces.extend([
-                [bottom_idx, top_idx, next_bottom_idx],
-                [top_idx, next_top_idx, next_bottom_idx]
-            ])
-        
+
+        # Quad faces between layers, emitted into one typed buffer from
+        # the arithmetic progression of pair indices
+        bottom = np.arange(0, len(vertices) - 2, 2, dtype=np.int32) + vertex_offset
+        column_faces = np.empty((2 * bottom.size, 3), dtype=np.int32)
+        column_faces[0::2] = np.stack([bottom, bottom + 1, bottom + 2], axis=1)
+        column_faces[1::2] = np.stack([bottom + 1, bottom + 3, bottom + 2], axis=1)
+        faces.extend(column_faces.tolist())
+
         return vertices, faces, layer_info
     
     def _separate_layer_from_columns(self, column_mesh: Dict, zones: List[Tuple[float, float]], layer_idx: int) -> trimesh.Trimesh:
         """Separate a specific layer from the column mesh."""
         all_vertices = column_mesh['vertices']
         layer_info = column_mesh['layer_info']
-        
-        # Collect vertices and faces for this layer
-        layer_vertices = []
-        layer_faces = []
-        vertex_map = {}  # old_idx -> new_idx
-        
-        # Go through each column and extract vertices for this layer
-        for (i, j), column_layer_info in layer_info.items():
-            if layer_idx in column_layer_info:
-                vertex_indices = column_layer_info[layer_idx]
-                
-                for old_idx in vertex_indices:
-                    if old_idx not in vertex_map:
-                        vertex_map[old_idx] = len(layer_vertices)
-                        layer_vertices.append(all_vertices[old_idx])
-        
-        if len(layer_vertices) == 0:
+
+        # Gather this layer's (bottom, top) vertex pairs in row-major
+        # column order straight from the info block
+        pairs = layer_info[:, :, layer_idx, :]
+        indices = pairs[pairs[:, :, 0] >= 0].ravel()
+
+        if indices.size == 0:
             return None
-        
+
+        layer_vertices = all_vertices[indices]
+
         # Create surface faces for this layer (connect adjacent columns)
         # This is where we create the actual layer surface
-        layer_faces = self._create_layer_surface_faces(layer_vertices, vertex_map, layer_idx)
+        layer_faces = self._create_layer_surface_faces(layer_vertices, layer_idx)
         
         if len(layer_faces) == 0:
             return None
         
         # Create mesh
-        mesh = trimesh.Trimesh(vertices=layer_vertices, faces=layer_faces)
+        mesh = trimesh.Trimesh(vertices=layer_vertices, faces=layer_faces, process=False)
         mesh = self.base_generator._validate_and_fix_mesh(mesh)
         
         return mesh
     
-    def _create_layer_surface_faces(self, layer_vertices: List, vertex_map: Dict, layer_idx: int) -> List:
+    def _create_layer_surface_faces(self, layer_vertices: List, layer_idx: int) -> List:
         """Create surface faces for a layer by connecting adjacent columns."""
         faces = []
         
@@ -268,34 +294,40 @@ class SimpleMultiColorMeshGenerator:
         
         return faces
     
-    def _create_point_grid(self, x_grid: np.ndarray, y_grid: np.ndarray, z_grid: np.ndarray, 
+    def _create_point_grid(self, x_grid: np.ndarray, y_grid: np.ndarray, z_grid: np.ndarray,
                           zones: List[Tuple[float, float]], layer_thickness: float) -> Dict:
-        """Create a shared vertex map for all layers."""
+        """Create a shared vertex map for all layers.
+
+        Vertices live in one contiguous (2N, 3) array - tops at even
+        slots, bottoms at odd slots - and the (i, j) -> vertex lookup is
+        an integer grid instead of a tuple-keyed dict.
+        """
         rows, cols = x_grid.shape
-        
-        # Shared vertex map: all vertices for all layers
-        shared_vertices = []
-        vertex_map = {}  # (i, j) -> vertex_index
+        valid = ~np.isnan(z_grid)
+
         layer_assignment = np.full((rows, cols), -1, dtype=int)
-        
-        # Create shared vertices for all valid coordinates
-        for i in range(rows):
-            for j in range(cols):
-                if not np.isnan(z_grid[i, j]):
-                    terrain_height = z_grid[i, j]
-                    point_zone = self._assign_elevation_to_zone(terrain_height, zones)
-                    layer_assignment[i, j] = point_zone
-                    
-                    x, y = x_grid[i, j], y_grid[i, j]
-                    
-                    # Create shared vertex (top and bottom)
-                    vertex_map[(i, j)] = len(shared_vertices)
-                    shared_vertices.append([x, y, terrain_height + layer_thickness])  # Top
-                    shared_vertices.append([x, y, terrain_height])  # Bottom
-        
+        layer_assignment[valid] = self._compute_zone_grid(z_grid, zones)[valid]
+
+        # Shared vertices (top and bottom) for all valid coordinates
+        idx = np.flatnonzero(valid.ravel())
+        xs = x_grid.ravel()[idx]
+        ys = y_grid.ravel()[idx]
+        zs = z_grid.ravel()[idx]
+
+        shared_vertices = np.empty((2 * idx.size, 3), dtype=x_grid.dtype)
+        shared_vertices[0::2, 0] = xs
+        shared_vertices[0::2, 1] = ys
+        shared_vertices[0::2, 2] = zs + layer_thickness  # Top
+        shared_vertices[1::2, 0] = xs
+        shared_vertices[1::2, 1] = ys
+        shared_vertices[1::2, 2] = zs  # Bottom
+
+        vertex_index_grid = np.full((rows, cols), -1, dtype=np.int32)
+        vertex_index_grid.ravel()[idx] = np.arange(idx.size, dtype=np.int32) * 2
+
         return {
             'shared_vertices': shared_vertices,
-            'vertex_map': vertex_map,
+            'vertex_index_grid': vertex_index_grid,
             'layer_assignment': layer_assignment,
             'layer_thickness': layer_thickness,
             'shape': (rows, cols)
@@ -313,28 +345,24 @@ class SimpleMultiColorMeshGenerator:
         # Add base (from terrain surface down to z=0)
         vertices, faces = self.base_generator._add_base(vertices, faces)
         
-        # Create mesh
-        mesh = trimesh.Trimesh(vertices=vertices, faces=faces)
-        mesh = self.base_generator._validate_and_fix_mesh(mesh)
-        
+        # Create mesh; this is the grid surface + base construction
+        # generate_mesh trusts, so validation can be skipped
+        mesh = trimesh.Trimesh(vertices=vertices, faces=faces, process=False)
+        mesh = self.base_generator._validate_and_fix_mesh(mesh, trusted=True)
+
         return mesh
-    
+
     def _create_layer_from_point_grid(self, point_grid_data: Dict, grid_shape: Tuple[int, int], layer_idx: int) -> trimesh.Trimesh:
         """Create a layer using shared vertices."""
         shared_vertices = point_grid_data['shared_vertices']
-        vertex_map = point_grid_data['vertex_map']
+        vertex_index_grid = point_grid_data['vertex_index_grid']
         layer_assignment = point_grid_data['layer_assignment']
         rows, cols = grid_shape
-        
-        # Use shared vertices and only create faces for this layer's coordinates
-        vertex_indices = np.full((rows, cols), -1, dtype=int)
-        
-        for i in range(rows):
-            for j in range(cols):
-                if layer_assignment[i, j] >= layer_idx:  # Include if this layer is <= point's zone
-                    # Use shared vertex index
-                    vertex_indices[i, j] = vertex_map[(i, j)]
-        
+
+        # Use shared vertices and only create faces for this layer's
+        # coordinates (include if this layer is <= point's zone)
+        vertex_indices = np.where(layer_assignment >= layer_idx, vertex_index_grid, -1)
+
         # Check if this layer has any vertices
         if not np.any(vertex_indices >= 0):
             return None
@@ -346,76 +374,77 @@ class SimpleMultiColorMeshGenerator:
             return None
         
         # Create mesh with shared vertices
-        mesh = trimesh.Trimesh(vertices=shared_vertices, faces=faces)
+        mesh = trimesh.Trimesh(vertices=shared_vertices, faces=faces, process=False)
         mesh = self.base_generator._validate_and_fix_mesh(mesh)
         
         return mesh
     
-    def _create_shared_faces(self, vertex_indices: np.ndarray, rows: int, cols: int) -> List:
+    def _create_shared_faces(self, vertex_indices: np.ndarray, rows: int, cols: int) -> np.ndarray:
         """Create faces using shared vertex indices."""
-        faces = []
-        
-        # Create top surface faces
-        for i in range(rows - 1):
-            for j in range(cols - 1):
-                # Check if all 4 corners have vertices
-                if (vertex_indices[i, j] >= 0 and vertex_indices[i, j+1] >= 0 and
-                    vertex_indices[i+1, j] >= 0 and vertex_indices[i+1, j+1] >= 0):
-                    
-                    # Top face vertices (every vertex stored as pairs: top, bottom)
-                    v00_top = vertex_indices[i, j]
-                    v01_top = vertex_indices[i, j+1]
-                    v10_top = vertex_indices[i+1, j]
-                    v11_top = vertex_indices[i+1, j+1]
-                    
-                    # Create top surface triangles
-                    faces.extend([
-                        [v00_top, v01_top, v10_top],
-                        [v01_top, v11_top, v10_top]
-                    ])
-                    
-                    # Bottom face vertices
-                    v00_bottom = v00_top + 1
-                    v01_bottom = v01_top + 1
-                    v10_bottom = v10_top + 1
-                    v11_bottom = v11_top + 1
-                    
-                    # Create bottom surface triangles (reverse winding)
-                    faces.extend([
-                        [v00_bottom, v10_bottom, v01_bottom],
-                        [v01_bottom, v10_bottom, v11_bottom]
-                    ])
-        
-        # Create side walls between adjacent cells
-        for i in range(rows):
-            for j in range(cols):
-                if vertex_indices[i, j] >= 0:
-                    curr_top = vertex_indices[i, j]
-                    curr_bottom = curr_top + 1
-                    
-                    # Check right neighbor
-                    if j + 1 < cols and vertex_indices[i, j + 1] >= 0:
-                        next_top = vertex_indices[i, j + 1]
-                        next_bottom = next_top + 1
-                        
-                        # Create wall between current and right neighbor
-                        faces.extend([
-                            [curr_bottom, curr_top, next_bottom],
-                            [curr_top, next_top, next_bottom]
-                        ])
-                    
-                    # Check bottom neighbor
-                    if i + 1 < rows and vertex_indices[i + 1, j] >= 0:
-                        next_top = vertex_indices[i + 1, j]
-                        next_bottom = next_top + 1
-                        
-                        # Create wall between current and bottom neighbor
-                        faces.extend([
-                            [curr_bottom, next_top, curr_top],
-                            [curr_bottom, next_bottom, next_top]
-                        ])
-        
-        return faces
+        top_bottom, _, _ = self._quad_surface_faces(vertex_indices)
+        walls, _ = self._neighbor_wall_faces(vertex_indices)
+        return np.concatenate([top_bottom, walls])
+
+    @staticmethod
+    def _quad_surface_faces(vertex_indices: np.ndarray) -> Tuple[np.ndarray, int, int]:
+        """Top and bottom surface triangles for every complete quad.
+
+        Vertices are stored as top/bottom pairs, so the bottom corner of
+        any cell is its top index + 1. The four corner grids are shifted
+        views of `vertex_indices`; complete quads are found with one mask
+        and both surfaces are emitted in four strided assignments instead
+        of a per-cell Python loop. Returns (faces, top_count, bottom_count).
+        """
+        vi = vertex_indices
+        valid = vi >= 0
+
+        # Corner indices for every cell, as shifted views (no copies)
+        v00, v01 = vi[:-1, :-1], vi[:-1, 1:]
+        v10, v11 = vi[1:, :-1], vi[1:, 1:]
+        quad_ok = valid[:-1, :-1] & valid[:-1, 1:] & valid[1:, :-1] & valid[1:, 1:]
+
+        q00, q01 = v00[quad_ok], v01[quad_ok]
+        q10, q11 = v10[quad_ok], v11[quad_ok]
+
+        faces = np.empty((4 * q00.size, 3), dtype=np.int32)
+        half = 2 * q00.size
+        faces[0:half:2] = np.stack([q00, q01, q10], axis=1)
+        faces[1:half:2] = np.stack([q01, q11, q10], axis=1)
+        # Bottom surface with reverse winding so it faces down
+        faces[half::2] = np.stack([q00 + 1, q10 + 1, q01 + 1], axis=1)
+        faces[half + 1::2] = np.stack([q01 + 1, q10 + 1, q11 + 1], axis=1)
+
+        return faces, half, half
+
+    @staticmethod
+    def _neighbor_wall_faces(vertex_indices: np.ndarray) -> Tuple[np.ndarray, int]:
+        """Side-wall triangles between horizontally/vertically adjacent cells.
+
+        Each valid right/down neighbor pair gets a two-triangle wall quad,
+        found with pairwise masks over shifted views of the index grid.
+        Returns (faces, wall_count).
+        """
+        vi = vertex_indices
+        valid = vi >= 0
+
+        # Walls between each cell and its right neighbor
+        right_ok = valid[:, :-1] & valid[:, 1:]
+        curr = vi[:, :-1][right_ok]
+        nxt = vi[:, 1:][right_ok]
+        right_walls = np.empty((2 * curr.size, 3), dtype=np.int32)
+        right_walls[0::2] = np.stack([curr + 1, curr, nxt + 1], axis=1)
+        right_walls[1::2] = np.stack([curr, nxt, nxt + 1], axis=1)
+
+        # Walls between each cell and its bottom neighbor
+        down_ok = valid[:-1] & valid[1:]
+        curr = vi[:-1][down_ok]
+        nxt = vi[1:][down_ok]
+        down_walls = np.empty((2 * curr.size, 3), dtype=np.int32)
+        down_walls[0::2] = np.stack([curr + 1, nxt, curr], axis=1)
+        down_walls[1::2] = np.stack([curr + 1, nxt + 1, nxt], axis=1)
+
+        walls = np.concatenate([right_walls, down_walls])
+        return walls, len(walls)
     
     def _create_layer_faces_from_grid(self, layer_vertices: List, vertex_indices: np.ndarray, 
                                      vertex_map: Dict, layer_grid: Dict, rows: int, cols: int) -> Tuple[np.ndarray, np.ndarray]:
@@ -487,89 +516,68 @@ class SimpleMultiColorMeshGenerator:
         
         return np.array(layer_vertices), np.array(faces)
     
-    def _create_color_layer(self, x_grid: np.ndarray, y_grid: np.ndarray, z_grid: np.ndarray, 
-                           zones: List[Tuple[float, float]], zone_idx: int) -> trimesh.Trimesh:
+    def _create_color_layer(self, ctx: _GridContext, zone_idx: int) -> trimesh.Trimesh:
         """Create a color layer for the specified zone."""
-        
+        x_grid, y_grid, z_grid = ctx.x_grid, ctx.y_grid, ctx.z_grid
+        zones = ctx.zones
+
         print(f"\n🔧 DEBUG: Creating layer {zone_idx}")
         print(f"   Zone bounds: {zones[zone_idx] if zone_idx < len(zones) else 'N/A'}")
-        
+
         rows, cols = x_grid.shape
-        vertices = []
-        faces = []
-        vertex_indices = np.full((rows, cols), -1, dtype=int)
-        
+
         layer_thickness = self.config.terrain.colors.layer_thickness_mm
         print(f"   Layer thickness: {layer_thickness}mm")
-        
-        # Debug counters
-        own_zone_points = 0
-        boundary_points = 0
-        skipped_points = 0
-        border_conflicts = []
-        
-        # Loop through the grid and create vertices for this layer
-        for i in range(rows):
-            for j in range(cols):
-                if not np.isnan(z_grid[i, j]):
-                    terrain_height = z_grid[i, j]  # This already includes base layer thickness
-                    point_zone = self._assign_elevation_to_zone(terrain_height, zones)
-                    
-                    # Include points that belong to this zone OR boundary points from higher zones
-                    should_include = False
-                    inclusion_reason = ""
-                    
-                    if point_zone == zone_idx:
-                        should_include = True
-                        inclusion_reason = "own_zone"
-                        own_zone_points += 1
-                    elif point_zone > zone_idx:
-                        # Check if this higher-zone point is adjacent to a point in our zone
-                        is_boundary = self._is_boundary_point(i, j, x_grid, y_grid, z_grid, zones, zone_idx)
-                        if is_boundary:
-                            should_include = True
-                            inclusion_reason = f"boundary_from_zone_{point_zone}"
-                            boundary_points += 1
-                            border_conflicts.append({
-                                'grid_pos': (i, j),
-                                'xy_pos': (x_grid[i, j], y_grid[i, j]),
-                                'height': terrain_height,
-                                'point_zone': point_zone,
-                                'current_layer': zone_idx,
-                                'reason': inclusion_reason
-                            })
-                        else:
-                            skipped_points += 1
-                    else:
-                        skipped_points += 1
-                    
-                    if should_include:
-                        x, y = x_grid[i, j], y_grid[i, j]
-                        
-                        # Color layers sit ON TOP of the terrain
-                        # Top vertex (terrain surface + additional layer thickness)
-                        vertex_indices[i, j] = len(vertices)
-                        vertices.append([x, y, terrain_height + layer_thickness])
-                        
-                        # Bottom vertex (terrain surface)
-                        vertices.append([x, y, terrain_height])
-                        
-                        # Debug high-conflict border points
-                        if inclusion_reason.startswith("boundary_from_zone_") and len(border_conflicts) <= 5:
-                            print(f"     🚨 Border conflict at ({i},{j}): point_zone={point_zone} included in layer_{zone_idx}")
-                            print(f"        XY=({x:.1f},{y:.1f}) Z={terrain_height:.1f} reason={inclusion_reason}")
-        
+
+        # Include points that belong to this zone OR boundary points from
+        # higher zones, straight from the cached classification: the old
+        # per-pixel loop with its 8-neighbor scan is three mask ops here
+        own_mask = (ctx.zone_grid == zone_idx) & ctx.valid_mask
+        boundary_mask = (ctx.zone_grid > zone_idx) & ctx.valid_mask & ctx.adjacency_masks[zone_idx - 1]
+        include_mask = own_mask | boundary_mask
+
+        own_zone_points = int(own_mask.sum())
+        boundary_points = int(boundary_mask.sum())
+        skipped_points = int(ctx.valid_mask.sum()) - own_zone_points - boundary_points
+
+        # Gather all included points at once into a preallocated buffer:
+        # tops at even slots, bottoms at odd slots (the pairing the face
+        # builders rely on), with no per-point Python list churn
+        idx = np.flatnonzero(include_mask.ravel())
+        xs = x_grid.ravel()[idx]
+        ys = y_grid.ravel()[idx]
+        # Terrain heights already include base layer thickness
+        zs = z_grid.ravel()[idx]
+
+        vertices = np.empty((2 * idx.size, 3), dtype=x_grid.dtype)
+        vertices[0::2, 0] = xs
+        vertices[0::2, 1] = ys
+        # Color layers sit ON TOP of the terrain: top at surface + layer
+        # thickness, bottom at the surface itself
+        vertices[0::2, 2] = zs + layer_thickness
+        vertices[1::2, 0] = xs
+        vertices[1::2, 1] = ys
+        vertices[1::2, 2] = zs
+
+        vertex_indices = np.full((rows, cols), -1, dtype=np.int32)
+        vertex_indices.ravel()[idx] = np.arange(idx.size, dtype=np.int32) * 2
+
+        # Debug high-conflict border points
+        for i, j in np.argwhere(boundary_mask)[:5]:
+            print(f"     🚨 Border conflict at ({i},{j}): point_zone={ctx.zone_grid[i, j]} included in layer_{zone_idx}")
+            print(f"        XY=({x_grid[i, j]:.1f},{y_grid[i, j]:.1f}) Z={z_grid[i, j]:.1f} reason=boundary_from_zone_{ctx.zone_grid[i, j]}")
+
         # Print debug summary
         print(f"   📊 Layer {zone_idx} summary:")
         print(f"      Own zone points: {own_zone_points}")
         print(f"      Boundary points: {boundary_points} (potential conflicts)")
         print(f"      Skipped points: {skipped_points}")
         print(f"      Total vertices: {len(vertices)}")
-        print(f"      Border conflicts: {len(border_conflicts)}")
-        
-        if len(border_conflicts) > 5:
-            print(f"      ⚠️  {len(border_conflicts) - 5} more border conflicts not shown")
-        
+        print(f"      Border conflicts: {boundary_points}")
+
+        if boundary_points > 5:
+            print(f"      ⚠️  {boundary_points - 5} more border conflicts not shown")
+
         if len(vertices) == 0:
             print(f"   ❌ Layer {zone_idx} has no vertices - skipping")
             return None
@@ -579,125 +587,49 @@ class SimpleMultiColorMeshGenerator:
         vertices, faces = self._create_layer_faces(vertices, vertex_indices, rows, cols, zone_idx)
         
         # Create mesh
-        mesh = trimesh.Trimesh(vertices=vertices, faces=faces)
+        mesh = trimesh.Trimesh(vertices=vertices, faces=faces, process=False)
         mesh = self.base_generator._validate_and_fix_mesh(mesh)
         
         return mesh
     
     def _create_layer_faces(self, vertices: List, vertex_indices: np.ndarray, rows: int, cols: int, zone_idx: int = -1) -> Tuple[np.ndarray, np.ndarray]:
         """Create faces for a layer mesh - only connect adjacent cells, no walls between disconnected pieces."""
-        faces = []
-        face_conflicts = []
-        
-        # Create top surface faces
-        top_faces = 0
-        bottom_faces = 0
-        for i in range(rows - 1):
-            for j in range(cols - 1):
-                # Check if all 4 corners have vertices
-                if (vertex_indices[i, j] >= 0 and vertex_indices[i, j+1] >= 0 and
-                    vertex_indices[i+1, j] >= 0 and vertex_indices[i+1, j+1] >= 0):
-                    
-                    # Top face vertices (every vertex is stored as pairs: top, bottom)
-                    v00_top = vertex_indices[i, j]
-                    v01_top = vertex_indices[i, j+1]
-                    v10_top = vertex_indices[i+1, j]
-                    v11_top = vertex_indices[i+1, j+1]
-                    
-                    # Create top surface triangles
-                    faces.extend([
-                        [v00_top, v01_top, v10_top],
-                        [v01_top, v11_top, v10_top]
-                    ])
-                    top_faces += 2
-                    
-                    # Bottom face vertices
-                    v00_bottom = vertex_indices[i, j] + 1
-                    v01_bottom = vertex_indices[i, j+1] + 1
-                    v10_bottom = vertex_indices[i+1, j] + 1
-                    v11_bottom = vertex_indices[i+1, j+1] + 1
-                    
-                    # Create bottom surface triangles (reverse winding)
-                    faces.extend([
-                        [v00_bottom, v10_bottom, v01_bottom],
-                        [v01_bottom, v10_bottom, v11_bottom]
-                    ])
-                    bottom_faces += 2
-        
-        # Create side walls ONLY between adjacent cells - no boundary connection
-        wall_faces = 0
-        for i in range(rows):
-            for j in range(cols):
-                if vertex_indices[i, j] >= 0:
-                    curr_top = vertex_indices[i, j]
-                    curr_bottom = vertex_indices[i, j] + 1
-                    
-                    # Check right neighbor
-                    if j + 1 < cols and vertex_indices[i, j + 1] >= 0:
-                        next_top = vertex_indices[i, j + 1]
-                        next_bottom = vertex_indices[i, j + 1] + 1
-                        
-                        # Create wall between current and right neighbor
-                        faces.extend([
-                            [curr_bottom, curr_top, next_bottom],
-                            [curr_top, next_top, next_bottom]
-                        ])
-                        wall_faces += 2
-                    
-                    # Check bottom neighbor
-                    if i + 1 < rows and vertex_indices[i + 1, j] >= 0:
-                        next_top = vertex_indices[i + 1, j]
-                        next_bottom = vertex_indices[i + 1, j] + 1
-                        
-                        # Create wall between current and bottom neighbor
-                        faces.extend([
-                            [curr_bottom, next_top, curr_top],
-                            [curr_bottom, next_bottom, next_top]
-                        ])
-                        wall_faces += 2
-        
+        top_bottom, top_faces, bottom_faces = self._quad_surface_faces(vertex_indices)
+        walls, wall_faces = self._neighbor_wall_faces(vertex_indices)
+        faces = np.concatenate([top_bottom, walls])
+
         print(f"      Face creation summary: {top_faces} top + {bottom_faces} bottom + {wall_faces} wall = {len(faces)} total")
-        
-        return np.array(vertices), np.array(faces)
+
+        return np.asarray(vertices), faces
     
     def _get_boundary_indices(self, vertex_indices: np.ndarray, rows: int, cols: int) -> List[int]:
         """Get boundary vertex indices for wall construction."""
-        boundary = []
-        
-        # Top edge
-        for j in range(cols):
-            if vertex_indices[0, j] >= 0:
-                boundary.append(vertex_indices[0, j])
-        
-        # Right edge
-        for i in range(1, rows):
-            if vertex_indices[i, cols-1] >= 0:
-                boundary.append(vertex_indices[i, cols-1])
-        
-        # Bottom edge (reverse)
-        for j in range(cols-2, -1, -1):
-            if vertex_indices[rows-1, j] >= 0:
-                boundary.append(vertex_indices[rows-1, j])
-        
-        # Left edge (reverse)
-        for i in range(rows-2, 0, -1):
-            if vertex_indices[i, 0] >= 0:
-                boundary.append(vertex_indices[i, 0])
-        
-        return boundary
+        # Perimeter as four edge slices - top left-to-right, right
+        # top-to-bottom, bottom right-to-left, left bottom-to-top - with
+        # unassigned cells masked out in one pass
+        boundary = np.concatenate([
+            vertex_indices[0, :],
+            vertex_indices[1:, -1],
+            vertex_indices[-1, -2::-1],
+            vertex_indices[-2:0:-1, 0],
+        ])
+        return boundary[boundary >= 0].tolist()
     
     def save_multi_color_stls(self, meshes: Dict[str, trimesh.Trimesh], base_filename: str) -> List[str]:
         """Save multi-color meshes as separate STL files."""
-        import os
-        
         # Create output directory
         output_dir = base_filename.replace('.stl', '_output')
         os.makedirs(output_dir, exist_ok=True)
-        
-        filenames = []
-        for layer_name, mesh in meshes.items():
-            filename = os.path.join(output_dir, f"{base_filename.replace('.stl', '')}_{layer_name}.stl")
+
+        stem = base_filename.replace('.stl', '')
+
+        def export_one(layer_name: str, mesh: trimesh.Trimesh) -> str:
+            filename = os.path.join(output_dir, f"{stem}_{layer_name}.stl")
             mesh.export(filename)
-            filenames.append(filename)
-        
-        return filenames
\ No newline at end of file
+            return filename
+
+        # Each layer serializes and writes independently; binary STL
+        # encoding is numpy byte-packing that runs without the GIL, so
+        # the exports overlap. map preserves layer order
+        with ThreadPoolExecutor(max_workers=min(len(meshes), os.cpu_count() or 1)) as executor:
+            return list(executor.map(lambda item: export_one(*item), meshes.items()))
\ No newline at end of file
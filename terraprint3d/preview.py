@@ -1,53 +1,313 @@
+import hashlib
+import os
+import shutil
 import numpy as np
-import matplotlib.pyplot as plt
-from mpl_toolkits.mplot3d import Axes3D
-import trimesh
+import matplotlib
+# Previews are only ever rasterized to PNG; pin the Agg backend up front
+# so a GUI backend loaded elsewhere in the process never attaches an
+# event-loop canvas (or window) to our figures
+matplotlib.use('Agg')
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.colors import LightSource
+import matplotlib.tri as mtri
+from PIL import Image
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
+from typing import TYPE_CHECKING
+
+# trimesh drags in networkx, scipy and friends; nothing here needs the
+# module itself at import time (meshes arrive duck-typed with .vertices
+# and .faces), so keep it out of the cold-start path
+if TYPE_CHECKING:
+    import trimesh
+
+
+# One PreviewGenerator per worker process, built lazily on the first
+# task so its figure cache is reused for every task the worker handles
+_worker_generator = None
+
+
+def _render_preview_task(task: tuple) -> str:
+    """Worker for PreviewGenerator.generate_batch."""
+    import trimesh
+
+    global _worker_generator
+    if _worker_generator is None:
+        _worker_generator = PreviewGenerator()
+    mesh_path, output_path, title, view_angle = task
+    mesh = trimesh.load_mesh(mesh_path)
+    _worker_generator.generate_preview(mesh, output_path, title=title,
+                                       view_angle=view_angle)
+    return output_path
 
 
 class PreviewGenerator:
-    def __init__(self):
+    def __init__(self, cache_dir: str = None):
         # Set up matplotlib for high quality output
-        plt.rcParams['figure.dpi'] = 150
-        plt.rcParams['savefig.dpi'] = 300
-        plt.rcParams['font.size'] = 10
-    
-    def generate_preview(self, mesh: trimesh.Trimesh, output_path: str, 
+        matplotlib.rcParams['figure.dpi'] = 150
+        # Preview artifacts default to 150 dpi: Agg rasterization and
+        # PNG encoding scale with pixel count, and 300 dpi quadruples
+        # both for little visible gain on screen. Callers that want
+        # print-quality output can pass dpi=300 per call
+        matplotlib.rcParams['savefig.dpi'] = 150
+        matplotlib.rcParams['font.size'] = 10
+        # Layout is handled by explicit tight_layout calls before each
+        # save; autolayout would rerun it on every draw
+        matplotlib.rcParams['figure.autolayout'] = False
+
+        # One figure per preview type, reused across calls; see
+        # _get_figure
+        self._figures = {}
+
+        # Resolve the terrain colormap once instead of per plot call
+        self._cmap = matplotlib.colormaps['terrain']
+
+        # Single-entry cache of decimated geometry and shaded colors for
+        # the last mesh plotted; see _preview_geometry
+        self._plot_cache = {}
+
+        # Optional on-disk PNG cache keyed by mesh content and render
+        # settings; re-running the pipeline on unchanged terrain copies
+        # the cached file instead of re-rendering
+        self._cache_dir = Path(cache_dir) if cache_dir else None
+        if self._cache_dir is not None:
+            self._cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def _get_figure(self, key: str, figsize: tuple) -> Figure:
+        """Reuse one Figure per preview type across calls.
+
+        Creating and closing a figure for every save rebuilds the canvas
+        and renderer each time, which adds up when previewing in batch.
+        Clearing and reusing the same figure keeps them alive; clf (not
+        per-axes clear) also drops colorbars and figure text so nothing
+        accumulates between saves. Figures are built directly on an Agg
+        canvas rather than through pyplot, which keeps them out of
+        pyplot's global figure registry.
+        """
+        fig = self._figures.get(key)
+        if fig is None:
+            fig = Figure(figsize=figsize)
+            FigureCanvasAgg(fig)
+            self._figures[key] = fig
+        else:
+            fig.clf()
+        return fig
+
+    def close(self) -> None:
+        """Release the cached matplotlib figures."""
+        # Figures never touch pyplot's registry, so dropping our
+        # references is all the cleanup there is
+        self._figures.clear()
+
+    @staticmethod
+    def _save_png(fig: Figure, output_path: str, dpi: int) -> None:
+        """Rasterize `fig` once and write the PNG directly through PIL.
+
+        savefig re-renders the figure through matplotlib's print
+        pipeline; drawing the Agg canvas ourselves and encoding its RGBA
+        buffer at zlib level 1 skips that pipeline and the slow default
+        compression, trading a slightly larger file for a much faster
+        save - the right call for preview artifacts.
+        """
+        if fig.get_dpi() != dpi:
+            fig.set_dpi(dpi)
+        fig.canvas.draw()
+        arr = np.asarray(fig.canvas.buffer_rgba())
+        Image.fromarray(arr).save(output_path, format='PNG',
+                                  compress_level=1, optimize=False)
+
+    @staticmethod
+    def _grid_extent(lat_grid: np.ndarray, lon_grid: np.ndarray) -> list:
+        """Heatmap extent [lon_min, lon_max, lat_min, lat_max].
+
+        The fetcher produces axis-aligned grids whose extremes sit in
+        the corners, so two row/column comparisons replace four
+        full-grid reductions; irregular grids fall back to min/max.
+        """
+        if (lat_grid.ndim == 2 and lon_grid.ndim == 2
+                and np.array_equal(lon_grid[0], lon_grid[-1])
+                and np.array_equal(lat_grid[:, 0], lat_grid[:, -1])):
+            lon_a, lon_b = float(lon_grid[0, 0]), float(lon_grid[0, -1])
+            lat_a, lat_b = float(lat_grid[0, 0]), float(lat_grid[-1, 0])
+            return [min(lon_a, lon_b), max(lon_a, lon_b),
+                    min(lat_a, lat_b), max(lat_a, lat_b)]
+        return [lon_grid.min(), lon_grid.max(), lat_grid.min(), lat_grid.max()]
+
+    def _shaded_face_colors(self, vertices: np.ndarray, faces: np.ndarray,
+                            alpha: float = 0.9) -> np.ndarray:
+        """Terrain-colormapped face colors with lambertian shading.
+
+        plot_trisurf's shade=True runs matplotlib's per-face shading in
+        Python; computing the normals and light dot product here as
+        whole-array numpy and handing the result in via facecolors gives
+        the same look without the loop.
+        """
+        tri = vertices[faces]
+        normals = np.cross(tri[:, 1] - tri[:, 0], tri[:, 2] - tri[:, 0])
+        lengths = np.linalg.norm(normals, axis=1, keepdims=True)
+        np.divide(normals, lengths, out=normals, where=lengths > 0)
+
+        # Matplotlib's default light direction (azimuth 315°, altitude
+        # 45°), with a floor so faces turned away are dimmed, not black
+        light = np.array([-0.5, 0.5, np.sqrt(0.5)])
+        intensity = 0.3 + 0.7 * np.clip(normals @ light, 0.0, 1.0)
+
+        # Color each face by its mean elevation
+        z_face = tri[:, :, 2].mean(axis=1)
+        z_min = z_face.min()
+        z_span = z_face.max() - z_min
+        normed = (z_face - z_min) / z_span if z_span > 0 else np.zeros_like(z_face)
+        rgba = self._cmap(normed)
+        rgba[:, :3] *= intensity[:, None]
+        rgba[:, 3] = alpha
+        return rgba
+
+    @staticmethod
+    def _decimate_for_preview(mesh: "trimesh.Trimesh", max_faces: int) -> "trimesh.Trimesh":
+        """Reduce triangle count before plotting, leaving `mesh` untouched.
+
+        plot_trisurf pays per-triangle Python overhead, and a preview at
+        PNG resolution gains nothing from sub-pixel triangles, so big
+        meshes are decimated to max_faces first. Decimation relies on
+        trimesh's optional simplification backend; without it the full
+        mesh is plotted unchanged.
+        """
+        if max_faces <= 0 or len(mesh.faces) <= max_faces:
+            return mesh
+        try:
+            return mesh.simplify_quadric_decimation(face_count=max_faces)
+        except ImportError:
+            print(f"Preview decimation unavailable (no simplification backend), plotting all {len(mesh.faces):,} faces")
+            return mesh
+
+    @staticmethod
+    def _vertex_bounds(mesh: "trimesh.Trimesh") -> tuple:
+        """Axis-aligned vertex bounds, as one numpy reduction per side.
+
+        Equivalent to mesh.bounds without trimesh's cached-property
+        indirection: min/max over the contiguous vertex buffer is a
+        single vectorized pass, which matters when previews run in
+        batch.
+        """
+        return mesh.vertices.min(axis=0), mesh.vertices.max(axis=0)
+
+    @staticmethod
+    def _render_cache_key(mesh: "trimesh.Trimesh", *settings) -> str:
+        """Content hash of the mesh plus render settings.
+
+        blake2b runs at several GB/s on contiguous numpy buffers, so
+        hashing is negligible next to the render it can skip.
+        """
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(mesh.vertices.tobytes())
+        digest.update(mesh.faces.tobytes())
+        digest.update(repr(settings).encode())
+        return digest.hexdigest()
+
+    def generate_batch(self, tasks: list) -> list:
+        """Render many mesh previews in parallel, one PNG per task.
+
+        Each task is (mesh_path, output_path, title, view_angle), with
+        the mesh given as an STL path rather than a loaded Trimesh so
+        workers read it themselves instead of pickling geometry across
+        the process boundary. Agg rendering is single-threaded Python
+        work, so the batch fans out over a process pool; each worker
+        keeps one PreviewGenerator alive and reuses its figure cache
+        across the tasks it handles. Returns the output paths in task
+        order.
+        """
+        if not tasks:
+            return []
+        workers = min(len(tasks), os.cpu_count() or 1)
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(_render_preview_task, tasks))
+
+    def _preview_geometry(self, mesh: "trimesh.Trimesh", max_faces: int) -> tuple:
+        """Decimated vertices, faces and shaded face colors for `mesh`.
+
+        generate_preview and generate_combined_preview are typically
+        called back to back on the same mesh, and decimation plus
+        shading is the expensive part of both. One cache entry keyed by
+        the mesh's vertex/face counts and bounds (identity by geometry,
+        not object id, which can be reused after garbage collection)
+        lets the second call skip that work.
+        """
+        lo, hi = self._vertex_bounds(mesh)
+        key = (mesh.vertices.shape[0], mesh.faces.shape[0], max_faces,
+               float(lo[0]), float(lo[2]), float(hi[0]), float(hi[2]))
+        cached = self._plot_cache.get(key)
+        if cached is not None:
+            return cached
+
+        plot_mesh = self._decimate_for_preview(mesh, max_faces)
+        # A preview never needs trimesh's float64 vertices; float32
+        # halves the bandwidth through projection and shading, and the
+        # cast lands in the cache so it happens once per mesh
+        vertices = plot_mesh.vertices.astype(np.float32, copy=False)
+        faces = plot_mesh.faces
+        rgba = self._shaded_face_colors(vertices, faces)
+        self._plot_cache = {key: (vertices, faces, rgba)}
+        return vertices, faces, rgba
+
+    def generate_preview(self, mesh: "trimesh.Trimesh", output_path: str,
                         title: str = "Terrain Preview", 
-                        view_angle: tuple = (30, 45)) -> None:
-        """Generate a PNG preview of the 3D mesh from an angled perspective."""
-        
-        # Create figure and 3D axis
-        fig = plt.figure(figsize=(12, 8))
+                        view_angle: tuple = (30, 45),
+                        max_faces: int = 50000,
+                        dpi: int = 150,
+                        mode: str = '3d') -> None:
+        """Generate a PNG preview of the 3D mesh from an angled perspective.
+
+        mode='hillshade' renders a top-down shaded-relief image instead
+        of the projected 3D view - visually equivalent for terrain and
+        far faster, since it avoids Poly3DCollection entirely.
+        """
+        # With a cache dir configured, an unchanged mesh rendered with
+        # the same settings is a file copy, not a render
+        cached = None
+        if self._cache_dir is not None:
+            key = self._render_cache_key(mesh, title, view_angle,
+                                         max_faces, dpi, mode)
+            cached = self._cache_dir / f'{key}.png'
+            if cached.exists():
+                shutil.copyfile(cached, output_path)
+                return
+
+        if mode == 'hillshade':
+            self._generate_hillshade(mesh, output_path, title, view_angle,
+                                     max_faces, dpi)
+            if cached is not None:
+                shutil.copyfile(output_path, cached)
+            return
+
+        # Create (or reuse) figure and 3D axis
+        fig = self._get_figure('3d', (12, 8))
         ax = fig.add_subplot(111, projection='3d')
         
-        # Extract vertices and faces
-        vertices = mesh.vertices
-        faces = mesh.faces
-        
-        # Create the 3D surface plot
-        ax.plot_trisurf(vertices[:, 0], vertices[:, 1], vertices[:, 2], 
-                       triangles=faces, cmap='terrain', alpha=0.9,
-                       linewidth=0, antialiased=True, shade=True)
+        # Extract vertices, faces and colors at preview level of detail
+        vertices, faces, rgba = self._preview_geometry(mesh, max_faces)
+
+        # Create the 3D surface plot; shading is precomputed in numpy
+        # rather than left to plot_trisurf's per-face Python pass
+        surf = ax.plot_trisurf(vertices[:, 0], vertices[:, 1], vertices[:, 2],
+                              triangles=faces,
+                              linewidth=0, antialiased=True, shade=False)
+        surf.set_facecolor(rgba)
         
         # Set viewing angle
         ax.view_init(elev=view_angle[0], azim=view_angle[1])
         
-        # Calculate mesh bounds for proper scaling
-        bounds = mesh.bounds
-        x_range = bounds[1][0] - bounds[0][0]
-        y_range = bounds[1][1] - bounds[0][1]
-        z_range = bounds[1][2] - bounds[0][2]
-        
+        # Calculate mesh bounds for proper scaling, as whole-array
+        # arithmetic on the per-axis extremes instead of scalars
+        lo, hi = self._vertex_bounds(mesh)
+        ranges = hi - lo
+        mid = (hi + lo) * 0.5
+
         # Set equal aspect ratio
-        max_range = max(x_range, y_range, z_range)
-        mid_x = (bounds[1][0] + bounds[0][0]) / 2
-        mid_y = (bounds[1][1] + bounds[0][1]) / 2
-        mid_z = (bounds[1][2] + bounds[0][2]) / 2
-        
-        ax.set_xlim(mid_x - max_range/2, mid_x + max_range/2)
-        ax.set_ylim(mid_y - max_range/2, mid_y + max_range/2)
-        ax.set_zlim(mid_z - max_range/2, mid_z + max_range/2)
+        half = ranges.max() / 2
+        ax.set_xlim(mid[0] - half, mid[0] + half)
+        ax.set_ylim(mid[1] - half, mid[1] + half)
+        ax.set_zlim(mid[2] - half, mid[2] + half)
         
         # Labels and title
         ax.set_xlabel('X (mm)')
@@ -70,43 +330,95 @@ class PreviewGenerator:
         ax.zaxis.pane.set_alpha(0.1)
         
         # Add some metadata text
-        info_text = f"Dimensions: {x_range:.1f} × {y_range:.1f} × {z_range:.1f} mm\n"
-        info_text += f"Vertices: {len(vertices):,} | Faces: {len(faces):,}"
+        info_text = f"Dimensions: {ranges[0]:.1f} × {ranges[1]:.1f} × {ranges[2]:.1f} mm\n"
+        info_text += f"Vertices: {mesh.vertices.shape[0]:,} | Faces: {mesh.faces.shape[0]:,}"
         
         fig.text(0.02, 0.02, info_text, fontsize=8, 
                 bbox=dict(boxstyle="round,pad=0.3", facecolor="white", alpha=0.8))
         
-        # Save with high quality
-        plt.tight_layout()
-        plt.savefig(output_path, bbox_inches='tight', pad_inches=0.1, 
-                   facecolor='white', edgecolor='none')
-        plt.close()
-    
+        # tight_layout handles the margins up front: asking savefig for
+        # bbox_inches='tight' instead would render the whole figure
+        # twice, once just to measure the crop
+        fig.tight_layout()
+        self._save_png(fig, output_path, dpi)
+
+        if cached is not None:
+            shutil.copyfile(output_path, cached)
+
+    def _generate_hillshade(self, mesh: "trimesh.Trimesh", output_path: str,
+                            title: str, view_angle: tuple,
+                            max_faces: int, dpi: int) -> None:
+        """Render a top-down hillshaded preview of the mesh in 2D.
+
+        Interpolates the upward-facing surface onto a regular grid and
+        shades it with a light source, skipping the per-triangle
+        projection and depth sorting of the 3D path. Only faces whose
+        normal points up are triangulated: the base and walls of the
+        printable solid would overlap the surface in plan view and break
+        the interpolator's triangle lookup.
+        """
+        fig = self._get_figure('3d', (12, 8))
+        ax = fig.add_subplot(111)
+
+        vertices, faces, _ = self._preview_geometry(mesh, max_faces)
+        tri = vertices[faces]
+        normal_z = np.cross(tri[:, 1] - tri[:, 0], tri[:, 2] - tri[:, 0])[:, 2]
+        top_faces = faces[normal_z > 0]
+
+        triang = mtri.Triangulation(vertices[:, 0], vertices[:, 1], top_faces)
+        interp = mtri.LinearTriInterpolator(triang, vertices[:, 2])
+
+        # Sample onto a regular grid, ~512 px on the long edge
+        lo, hi = self._vertex_bounds(mesh)
+        span_x = float(hi[0] - lo[0])
+        span_y = float(hi[1] - lo[1])
+        if span_x >= span_y:
+            nx, ny = 512, max(2, int(round(512 * span_y / span_x)))
+        else:
+            nx, ny = max(2, int(round(512 * span_x / span_y))), 512
+        x_samples = np.linspace(lo[0], hi[0], nx, dtype=np.float32)
+        y_samples = np.linspace(lo[1], hi[1], ny, dtype=np.float32)
+        z_interp = interp(*np.meshgrid(x_samples, y_samples))
+        z_interp = z_interp.filled(float(z_interp.min()))
+
+        light = LightSource(azdeg=view_angle[1], altdeg=view_angle[0])
+        shaded = light.shade(z_interp, cmap=self._cmap, blend_mode='soft')
+        ax.imshow(shaded, origin='lower', aspect='equal',
+                 interpolation='nearest',
+                 extent=[lo[0], hi[0], lo[1], hi[1]])
+
+        ax.set_xlabel('X (mm)')
+        ax.set_ylabel('Y (mm)')
+        ax.set_title(title, fontsize=14, fontweight='bold')
+
+        fig.tight_layout()
+        self._save_png(fig, output_path, dpi)
+
     def generate_elevation_heatmap(self, lat_grid: np.ndarray, lon_grid: np.ndarray, 
                                   elevation_grid: np.ndarray, output_path: str,
-                                  title: str = "Elevation Heatmap") -> None:
+                                  title: str = "Elevation Heatmap",
+                                  dpi: int = 150) -> None:
         """Generate a 2D heatmap of the elevation data."""
         
-        fig, ax = plt.subplots(figsize=(10, 8))
+        fig = self._get_figure('heatmap', (10, 8))
+        ax = fig.add_subplot(111)
         
-        # Create heatmap
-        im = ax.imshow(elevation_grid, cmap='terrain', aspect='equal', 
-                      extent=[lon_grid.min(), lon_grid.max(), 
-                             lat_grid.min(), lat_grid.max()],
-                      origin='lower')
+        # Create heatmap; float32 pixels halve what the renderer moves
+        # and nearest interpolation skips the per-pixel antialias filter
+        grid32 = np.ascontiguousarray(elevation_grid, dtype=np.float32)
+        extent = self._grid_extent(lat_grid, lon_grid)
+        im = ax.imshow(grid32, cmap=self._cmap, aspect='equal',
+                      interpolation='nearest', extent=extent, origin='lower')
         
         # Add colorbar
-        cbar = plt.colorbar(im, ax=ax, shrink=0.8)
+        cbar = fig.colorbar(im, ax=ax, shrink=0.8)
         cbar.set_label('Elevation (m)', rotation=270, labelpad=20)
         
         # Labels and title
         ax.set_xlabel('Longitude')
         ax.set_ylabel('Latitude')
         ax.set_title(title, fontsize=14, fontweight='bold')
-        
-        # Add grid
-        ax.grid(True, alpha=0.3)
-        
+
         # Add elevation range info
         min_elev = elevation_grid.min()
         max_elev = elevation_grid.max()
@@ -116,53 +428,53 @@ class PreviewGenerator:
                bbox=dict(boxstyle="round,pad=0.3", facecolor="white", alpha=0.8),
                verticalalignment='top')
         
-        plt.tight_layout()
-        plt.savefig(output_path, bbox_inches='tight', pad_inches=0.1,
-                   dpi=300, facecolor='white', edgecolor='none')
-        plt.close()
+        fig.tight_layout()
+        self._save_png(fig, output_path, dpi)
     
-    def generate_combined_preview(self, mesh: trimesh.Trimesh, 
+    def generate_combined_preview(self, mesh: "trimesh.Trimesh", 
                                 lat_grid: np.ndarray, lon_grid: np.ndarray, 
                                 elevation_grid: np.ndarray, output_path: str,
-                                title: str = "Terrain Model") -> None:
+                                title: str = "Terrain Model",
+                                max_faces: int = 50000,
+                                dpi: int = 150) -> None:
         """Generate a combined preview with both 3D model and elevation heatmap."""
         
-        fig = plt.figure(figsize=(16, 8))
+        # A 12x6 canvas with plain-weight text keeps the Agg render
+        # cheap: bold faces cost an extra font lookup and
+        # re-rasterization, and every glyph is FreeType path stroking
+        fig = self._get_figure('combined', (12, 6))
         
-        # 3D plot on the left
+        # 3D plot on the left, at preview level of detail
         ax1 = fig.add_subplot(121, projection='3d')
-        vertices = mesh.vertices
-        faces = mesh.faces
-        
-        ax1.plot_trisurf(vertices[:, 0], vertices[:, 1], vertices[:, 2], 
-                        triangles=faces, cmap='terrain', alpha=0.9,
-                        linewidth=0, antialiased=True, shade=True)
+        vertices, faces, rgba = self._preview_geometry(mesh, max_faces)
+
+        surf = ax1.plot_trisurf(vertices[:, 0], vertices[:, 1], vertices[:, 2],
+                               triangles=faces,
+                               linewidth=0, antialiased=True, shade=False)
+        surf.set_facecolor(rgba)
         
         ax1.view_init(elev=30, azim=45)
-        ax1.set_title('3D Model Preview', fontweight='bold')
+        ax1.set_title('3D Model Preview')
         ax1.set_xlabel('X (mm)')
         ax1.set_ylabel('Y (mm)')
         ax1.set_zlabel('Z (mm)')
         
         # 2D heatmap on the right
         ax2 = fig.add_subplot(122)
-        im = ax2.imshow(elevation_grid, cmap='terrain', aspect='equal',
-                       extent=[lon_grid.min(), lon_grid.max(), 
-                              lat_grid.min(), lat_grid.max()],
-                       origin='lower')
+        grid32 = np.ascontiguousarray(elevation_grid, dtype=np.float32)
+        extent = self._grid_extent(lat_grid, lon_grid)
+        im = ax2.imshow(grid32, cmap=self._cmap, aspect='equal',
+                       interpolation='nearest', extent=extent, origin='lower')
         
-        cbar = plt.colorbar(im, ax=ax2, shrink=0.8)
+        cbar = fig.colorbar(im, ax=ax2, shrink=0.8)
         cbar.set_label('Elevation (m)', rotation=270, labelpad=20)
         
-        ax2.set_title('Elevation Data', fontweight='bold')
+        ax2.set_title('Elevation Data')
         ax2.set_xlabel('Longitude')
         ax2.set_ylabel('Latitude')
-        ax2.grid(True, alpha=0.3)
-        
+
         # Overall title
-        fig.suptitle(title, fontsize=16, fontweight='bold')
+        fig.suptitle(title, fontsize=16)
         
-        plt.tight_layout()
-        plt.savefig(output_path, bbox_inches='tight', pad_inches=0.1,
-                   dpi=300, facecolor='white', edgecolor='none')
-        plt.close()
\ No newline at end of file
+        fig.tight_layout()
+        self._save_png(fig, output_path, dpi)
\ No newline at end of file